@@ -0,0 +1,313 @@
+"""Synthetic stand-in for the Kantata API used by the offline benchmarks.
+
+    python -m benchmarks.fake_kantata --entries 10000 --port 8765 --latency 0.02 --jitter 0.01
+
+Serves the endpoints the MCP server calls, with Kantata's pagination
+(``page``/``per_page``, ``meta.page_count``, a ``Link: rel="next"`` header)
+and ``include`` side-loading of users, workspaces and stories.  The
+dataset is generated deterministically from ``--seed`` and spans one
+calendar year (``--year``).  Every request sleeps ``latency ± jitter``
+seconds.  Only the standard library is used so the fake runs anywhere.
+
+``GET /__stats`` returns request counts per endpoint and ``POST /__reset``
+clears them.  Once listening, the server prints ``ready <port>`` on stdout.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/v1"
+_RECORD_ID = re.compile(r"/\d+")
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 200
+
+FIRST_NAMES = (
+    "Alex", "Blake", "Casey", "Dana", "Eli", "Frankie", "Gray", "Harper", "Indy", "Jordan",
+    "Kai", "Logan", "Morgan", "Noel", "Oakley", "Parker", "Quinn", "Riley", "Sage", "Taylor",
+)
+LAST_NAMES = (
+    "Anderson", "Brooks", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ito", "Jensen",
+    "Khan", "Lopez", "Murphy", "Novak", "Okafor", "Patel", "Rossi", "Silva", "Tanaka", "Weber",
+)
+PROJECT_WORDS = (
+    "Atlas", "Beacon", "Cascade", "Delta", "Ember", "Falcon", "Granite", "Harbor", "Iris", "Juniper",
+    "Keystone", "Lumen", "Meridian", "Nimbus", "Orchid", "Pioneer", "Quartz", "Summit", "Tundra", "Vertex",
+)
+TASK_WORDS = ("Design", "Build", "Review", "Testing", "Planning", "Support", "Research", "Deployment")
+SIDELOADS = (("users", "user", "user_id"), ("workspaces", "workspace", "workspace_id"),
+             ("stories", "story", "story_id"))
+NOTES = ("", "Standup and planning", "Client call", "Implementation work", "Code review", "Bug fixing",
+         "Documentation updates", "Workshop prep")
+
+
+class Dataset:
+    """Users, workspaces, stories and date-sorted time entries."""
+
+    def __init__(self, entries: int, year: int, seed: int):
+        rng = random.Random(seed)
+        user_count = min(500, max(20, entries // 200))
+        workspace_count = min(200, max(10, entries // 500))
+
+        self.users = {}
+        for user_id in range(1, user_count + 1):
+            first = FIRST_NAMES[(user_id - 1) % len(FIRST_NAMES)]
+            last = LAST_NAMES[((user_id - 1) // len(FIRST_NAMES)) % len(LAST_NAMES)]
+            suffix = "" if user_id <= len(FIRST_NAMES) * len(LAST_NAMES) else f" {user_id}"
+            self.users[str(user_id)] = {
+                "id": str(user_id),
+                "first_name": first,
+                "last_name": last + suffix,
+                "full_name": f"{first} {last}{suffix}",
+                "email_address": f"user{user_id}@example.com",
+                "headline": "Consultant",
+                "account_id": "1",
+            }
+
+        self.workspaces = {}
+        self.stories = {}
+        for workspace_id in range(1, workspace_count + 1):
+            word = PROJECT_WORDS[(workspace_id - 1) % len(PROJECT_WORDS)]
+            self.workspaces[str(workspace_id)] = {
+                "id": str(workspace_id),
+                "title": f"{word} Project {workspace_id}",
+                "description": f"Synthetic workspace {workspace_id}",
+                "archived": False,
+                "currency": "USD",
+            }
+            for offset, task in enumerate(TASK_WORDS):
+                story_id = str((workspace_id - 1) * len(TASK_WORDS) + offset + 1)
+                self.stories[story_id] = {
+                    "id": story_id,
+                    "title": f"{task} {word}",
+                    "workspace_id": str(workspace_id),
+                    "state": "started",
+                    "story_type": "task",
+                }
+
+        first_day = date(year, 1, 1)
+        days = (date(year, 12, 31) - first_day).days + 1
+        rows = []
+        for index in range(entries):
+            workspace_id = rng.randint(1, workspace_count)
+            performed = (first_day + timedelta(days=rng.randrange(days))).isoformat()
+            rows.append((performed, index + 1, rng.randint(1, user_count), workspace_id,
+                         (workspace_id - 1) * len(TASK_WORDS) + rng.randrange(len(TASK_WORDS)) + 1))
+        rows.sort()
+
+        self.dates = [row[0] for row in rows]
+        self.entries = []
+        for performed, entry_id, user_id, workspace_id, story_id in rows:
+            billable = rng.random() < 0.6
+            self.entries.append({
+                "id": str(entry_id),
+                "date_performed": performed,
+                "time_in_minutes": rng.choice((15, 30, 45, 60, 90, 120, 180, 240, 480)),
+                "billable": billable,
+                "notes": rng.choice(NOTES),
+                "rate_in_cents": 15000 if billable else 0,
+                "cost_rate_in_cents": 7000,
+                "currency": "USD",
+                "approved": rng.random() < 0.5,
+                "is_invoiced": False,
+                "taxable": False,
+                "created_at": f"{performed}T17:00:00-05:00",
+                "updated_at": f"{performed}T17:30:00-05:00",
+                "user_id": str(user_id),
+                "workspace_id": str(workspace_id),
+                "story_id": str(story_id),
+                "role_id": None,
+            })
+        self.next_id = entries + 1
+        self._lock = threading.Lock()
+
+    @lru_cache(maxsize=64)
+    def matching(self, start: str, end: str, user_id: str | None, workspace_id: str | None,
+                 story_id: str | None, updated_after: str | None) -> tuple[int, ...]:
+        """Indices of entries matching the filters, in date order."""
+        low = bisect_left(self.dates, start) if start else 0
+        high = bisect_right(self.dates, end) if end else len(self.dates)
+        return tuple(
+            index for index in range(low, high)
+            if (user_id is None or self.entries[index]["user_id"] == user_id)
+            and (workspace_id is None or self.entries[index]["workspace_id"] == workspace_id)
+            and (story_id is None or self.entries[index]["story_id"] == story_id)
+            and (updated_after is None or self.entries[index]["updated_at"] > updated_after)
+        )
+
+    def allocate_id(self) -> str:
+        with self._lock:
+            entry_id = self.next_id
+            self.next_id += 1
+        return str(entry_id)
+
+
+def _page(params: dict) -> tuple[int, int]:
+    per_page = min(MAX_PER_PAGE, int(params.get("per_page", DEFAULT_PER_PAGE)))
+    return max(1, int(params.get("page", 1))), per_page
+
+
+def _paginated(key: str, records: list[dict], total: int, page: int, per_page: int) -> tuple[dict, dict]:
+    """Kantata's list envelope for one page of ``records`` out of ``total``."""
+    body = {
+        "count": total,
+        "results": [{"key": key, "id": record["id"]} for record in records],
+        key: {record["id"]: record for record in records},
+        "meta": {"count": total, "page_count": max(1, -(-total // per_page)), "page_number": page},
+    }
+    headers = {}
+    if page * per_page < total:
+        headers["Link"] = f'<{API_PREFIX}/{key}.json?page={page + 1}>; rel="next"'
+    return body, headers
+
+
+def _paginate(key: str, records: list[dict], params: dict) -> tuple[dict, dict]:
+    page, per_page = _page(params)
+    return _paginated(key, records[(page - 1) * per_page:page * per_page], len(records), page, per_page)
+
+
+class FakeKantata:
+    def __init__(self, dataset: Dataset, latency: float, jitter: float):
+        self.data = dataset
+        self.latency = latency
+        self.jitter = jitter
+        self.stats: Counter = Counter()
+        self._stats_lock = threading.Lock()
+
+    def delay(self) -> None:
+        seconds = self.latency + random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def count(self, method: str, path: str) -> None:
+        endpoint = _RECORD_ID.sub("/{id}", path)
+        with self._stats_lock:
+            self.stats[f"{method} {endpoint}"] += 1
+
+    def _search(self, records: dict, field: str, term: str | None) -> list[dict]:
+        if not term:
+            return list(records.values())
+        term = term.lower()
+        return [record for record in records.values() if term in record[field].lower()]
+
+    def time_entries(self, params: dict) -> tuple[dict, dict]:
+        start, _, end = params.get("date_performed_between", "").partition(":")
+        indices = self.data.matching(
+            start, end, params.get("with_user_ids"), params.get("workspace_id"), params.get("story_id"),
+            params.get("updated_after"),
+        )
+        page, per_page = _page(params)
+        chunk = [self.data.entries[index] for index in indices[(page - 1) * per_page:page * per_page]]
+        body, headers = _paginated("time_entries", chunk, len(indices), page, per_page)
+        include = set(params.get("include", "").split(","))
+        for kind, singular, field in SIDELOADS:
+            if singular in include:
+                records = getattr(self.data, kind)
+                body[kind] = {entry[field]: records[entry[field]] for entry in chunk if entry[field] in records}
+        return body, headers
+
+    def handle(self, method: str, path: str, params: dict, body: dict | None) -> tuple[int, dict, dict]:
+        if path == "/__stats":
+            return 200, dict(self.stats), {}
+        if path == "/__reset":
+            with self._stats_lock:
+                self.stats.clear()
+            return 200, {}, {}
+        if not path.startswith(API_PREFIX):
+            return 404, {"errors": [{"message": "not found"}]}, {}
+        path = path[len(API_PREFIX):]
+        self.count(method, path)
+        self.delay()
+
+        if path == "/time_entries.json" and method == "POST":
+            entry_id = self.data.allocate_id()
+            return 201, {"count": 1, "results": [{"key": "time_entries", "id": entry_id}],
+                         "time_entries": {entry_id: {"id": entry_id, **(body or {}).get("time_entry", {})}}}, {}
+        if path == "/time_entries.json":
+            body, headers = self.time_entries(params)
+            return 200, body, headers
+        if path == "/users.json":
+            return 200, *_paginate("users", self._search(self.data.users, "full_name", params.get("search")), params)
+        if path == "/workspaces.json":
+            return 200, *_paginate("workspaces", self._search(self.data.workspaces, "title", params.get("search")),
+                                   params)
+        if path == "/stories.json":
+            stories = self._search(self.data.stories, "title", params.get("search"))
+            if params.get("workspace_id"):
+                stories = [story for story in stories if story["workspace_id"] == params["workspace_id"]]
+            return 200, *_paginate("stories", stories, params)
+        if path == "/users/me.json":
+            return 200, {"users": {"1": self.data.users["1"]}}, {}
+        match = re.fullmatch(r"/(users|workspaces|stories)/(\d+)\.json", path)
+        if match:
+            kind, record_id = match.groups()
+            record = getattr(self.data, kind).get(record_id)
+            if record is None:
+                return 404, {"errors": [{"message": "not found"}]}, {}
+            return 200, {kind: {record_id: record}}, {}
+        return 404, {"errors": [{"message": "not found"}]}, {}
+
+
+def make_handler(fake: FakeKantata):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def _serve(self, method: str) -> None:
+            url = urlsplit(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            status, payload, headers = fake.handle(method, url.path, params, body)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetic Kantata API for benchmarks")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.01, help="± seconds of random latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    args = parser.parse_args()
+
+    fake = FakeKantata(Dataset(args.entries, args.year, args.seed), args.latency, args.jitter)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(fake))
+    server.daemon_threads = True
+    print(f"ready {server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Microbenchmark for the /query_time_entries table renderer.
+
+    python -m benchmarks.render [--rows 1000,10000,50000] [--repeat 5]
+
+Renders synthetic EntryColumns with ``format_time_entries_table`` and with
+the previous implementation kept below (per-week sort and dict of row
+lists, per-row date formatting and slice/``ljust`` padding, one list of
+lines joined at the end), checks that both produce identical text and
+reports the best time of ``--repeat`` runs for each.
+"""
+import argparse
+import random
+import timeit
+from datetime import date
+
+from mcp_server.columnar import EntryColumns
+from mcp_server.handlers.query_time_entries import (
+    HEADER_ROW, SEPARATOR, TABLE_FOOTER, TABLE_HEADER, format_summary, format_time_entries_table,
+)
+from mcp_server.records import TimeEntryRecord
+
+START, END = "2025-01-01", "2025-12-31"
+
+
+def legacy_format_week_block(columns: EntryColumns, week_start: int, rows: list[int]) -> list:
+    monday_date = date.fromordinal(week_start)
+    output = [f"=== Week of {monday_date.strftime('%B %d, %Y')} ===", TABLE_HEADER, HEADER_ROW, SEPARATOR]
+    for row in rows:
+        user_name = columns.user_name(row)
+        date_performed = date.fromordinal(columns.ordinals[row]).isoformat()
+        project_name = columns.project_name(row)
+        task_name = columns.task_name(row)
+        hours = columns.minutes[row] / 60.0
+        billable = "Yes" if columns.billable[row] else "No"
+        notes = columns.notes[row]
+        user_name = user_name[:11] if len(user_name) > 11 else user_name.ljust(11)
+        project_name = project_name[:15] if len(project_name) > 15 else project_name.ljust(15)
+        task_name = task_name[:15] if len(task_name) > 15 else task_name.ljust(15)
+        notes = notes[:18] if len(notes) > 18 else notes.ljust(18)
+        output.append(
+            f"│ {user_name} │ {date_performed} │ {project_name} │ {task_name} │ {hours:5.1f} │ {billable:8} │ {notes} │"
+        )
+    output.append(TABLE_FOOTER)
+    output.append("")
+    return output
+
+
+def legacy_format_time_entries_table(columns: EntryColumns, start_date: str, end_date: str) -> str:
+    if not len(columns):
+        return f"No time entries found for {start_date} to {end_date}"
+    output = []
+    for week_start, rows in columns.rows_by_week().items():
+        output.extend(legacy_format_week_block(columns, week_start, rows))
+    output.extend(format_summary(*columns.totals()))
+    return "\n".join(output)
+
+
+def synthetic_columns(rows: int, seed: int = 1) -> EntryColumns:
+    """Columns holding ``rows`` entries spread over 2025 with realistic name reuse."""
+    rng = random.Random(seed)
+    first = date(2025, 1, 1).toordinal()
+    users = [f"User {n} Lastname" if n % 3 else f"U{n}" for n in range(1, 41)]
+    projects = [f"Project {n} for a long client name" if n % 2 else f"P{n}" for n in range(1, 61)]
+    notes = ["", "Standup", "Implementation work on the importer", "Client call", "Review"]
+    entries = {}
+    for n in range(rows):
+        user = rng.randrange(len(users))
+        project = rng.randrange(len(projects))
+        task = project * 8 + rng.randrange(8)
+        entries[str(n)] = TimeEntryRecord(
+            id=str(n),
+            date_performed=date.fromordinal(first + rng.randrange(365)).isoformat(),
+            user_id=user + 1,
+            workspace_id=project + 1,
+            story_id=task + 1 if task % 5 else None,
+            time_in_minutes=rng.choice((15, 30, 45, 60, 90, 120, 480)),
+            billable=rng.random() < 0.6,
+            notes=rng.choice(notes),
+            updated_at=None,
+            user_name=users[user],
+            project_name=projects[project],
+            task_name=f"Task {task}" if task % 5 else None,
+        )
+    return EntryColumns.from_entries(entries, START, END)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", default="1000,10000,50000", help="comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for rows in (int(rows) for rows in args.rows.split(",")):
+        columns = synthetic_columns(rows)
+        if legacy_format_time_entries_table(columns, START, END) != format_time_entries_table(columns, START, END):
+            raise SystemExit(f"renderers disagree for {rows} rows")
+        legacy = min(timeit.repeat(
+            lambda: legacy_format_time_entries_table(columns, START, END), number=1, repeat=args.repeat
+        ))
+        current = min(timeit.repeat(
+            lambda: format_time_entries_table(columns, START, END), number=1, repeat=args.repeat
+        ))
+        print(f"{rows:>8} {legacy * 1000:>10.1f} {current * 1000:>11.1f} {legacy / current:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
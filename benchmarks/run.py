@@ -0,0 +1,327 @@
+"""Offline benchmarks for the MCP server against the synthetic Kantata API.
+
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--repeat 5] [--output results.json]
+
+For every dataset size a fresh interpreter starts ``benchmarks.fake_kantata``,
+points the server at it through ``KANTATA_BASE_URL`` and drives the app
+in-process over ASGI, so nothing leaves the machine and no token is needed.
+Each scenario is run ``--repeat`` times with the lookup and query caches
+flushed in between, recording:
+
+- latency (p50/p95 of the timed runs, in ms; scenarios faster than
+  FAST_MS get at least FAST_RUNS timed runs, so their median is stable)
+- for NDJSON streams, the median time until the first event after
+  ``start`` arrived (first_event_ms)
+- upstream calls, as counted by the fake
+- peak memory allocated while serving the request (one extra run under
+  tracemalloc, so tracing never skews the latency figures)
+
+Results are compared with ``benchmarks/thresholds.json``.  Latency and
+memory may exceed a threshold by ``--tolerance`` plus a small absolute
+slack (SLACK) before counting as a regression; upstream calls may not
+exceed it at all.  The exit status is 1 when anything regressed.
+``--update-thresholds`` records the current results as the new thresholds;
+re-record them whenever a change moves the numbers on purpose.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+THRESHOLDS_PATH = Path(__file__).with_name("thresholds.json")
+DEFAULT_SIZES = (1000, 10000, 100000)
+METRICS = ("p50_ms", "first_event_ms", "upstream_calls", "peak_kib")
+# Absolute slack on top of --tolerance, so fast scenarios and small
+# allocations do not flap on scheduler and upstream-jitter noise
+SLACK = {"p50_ms": 15, "first_event_ms": 15, "upstream_calls": 0, "peak_kib": 256}
+# Scenarios faster than FAST_MS get at least FAST_RUNS timed runs, so the
+# median is not decided by one or two jittery requests
+FAST_MS = 100
+FAST_RUNS = 15
+
+
+def scenarios(names: dict) -> list[tuple[str, str, str, dict | None]]:
+    """``(name, method, path, json)`` for every benchmarked request."""
+    return [
+        ("query_week", "POST", "/query_time_entries", {"time_period": "2025-06-02 to 2025-06-08"}),
+        ("query_user_quarter", "POST", "/query_time_entries",
+         {"time_period": "Q2 2025", "user_name": names["user"]}),
+        ("query_project_year", "POST", "/query_time_entries",
+         {"time_period": "2025", "project_name": names["workspace"]}),
+        ("query_year", "POST", "/query_time_entries", {"time_period": "2025"}),
+        ("stream_month", "POST", "/query_time_entries/stream", {"time_period": "2025-03-01 to 2025-03-31"}),
+        ("stream_year", "POST", "/query_time_entries/stream", {"time_period": "2025"}),
+        ("time_entry_by_name", "POST", "/time_entry_by_name", {
+            "user_name": names["user"],
+            "project_name": names["workspace"],
+            "task_name": names["story"],
+            "hours": 1.5,
+            "billable": True,
+            "date": "2025-06-03",
+            "notes": "benchmark",
+        }),
+        ("lookup_user", "GET", f"/lookup/user/{names['user']}", None),
+        ("lookup_workspace", "GET", f"/lookup/workspace/{names['workspace']}", None),
+        ("lookup_story", "GET", f"/lookup/story/{names['workspace_id']}/{names['story']}", None),
+    ]
+
+
+def start_fake(args, entries: int) -> tuple[subprocess.Popen, int]:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_kantata", "--entries", str(entries), "--port", "0",
+         "--latency", str(args.latency), "--jitter", str(args.jitter), "--seed", str(args.seed)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("ready "):
+        proc.kill()
+        raise RuntimeError("fake Kantata server failed to start")
+    return proc, int(line.split()[1])
+
+
+async def stream_asgi(app, path: str, body: dict) -> tuple[int, str, float | None]:
+    """POST ``body`` to an NDJSON endpoint of ``app``, talking ASGI directly.
+
+    httpx.ASGITransport only returns once the whole response is buffered, so
+    it cannot tell when an event arrived.  Returns the status code, the body
+    and the ms until the first event after ``start`` (None if there was none).
+    """
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0), "server": ("mcp", 80),
+        "headers": [(b"host", b"mcp"), (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode())],
+    }
+    requested = False
+    finished = asyncio.Event()
+    status = 500
+    chunks: list[bytes] = []
+    first_event = None
+    started = time.perf_counter()
+
+    async def receive() -> dict:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status, first_event
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            chunks.append(chunk)
+            if first_event is None and status < 400:
+                for line in chunk.splitlines():
+                    if line.strip() and json.loads(line).get("type") != "start":
+                        first_event = (time.perf_counter() - started) * 1000
+                        break
+            if not message.get("more_body", False):
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    return status, b"".join(chunks).decode(), first_event
+
+
+async def benchmark_size(args, entries: int) -> dict:
+    """Run every scenario against a fake holding ``entries`` time entries."""
+    import httpx
+
+    fake, port = start_fake(args, entries)
+    upstream = f"http://127.0.0.1:{port}"
+    os.environ.update({
+        "KANTATA_BASE_URL": f"{upstream}/api/v1",
+        "KANTATA_API_TOKEN": "benchmark",
+        "KANTATA_REPLICA_PATH": "",
+        "KANTATA_LOG_LEVEL": "WARNING",
+    })
+    if not args.rate_limit:
+        os.environ["KANTATA_RATE_LIMIT_PER_SECOND"] = "0"
+
+    from mcp_server.directory import directory
+    from mcp_server.main import app
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=upstream) as stub, app.router.lifespan_context(app):
+            deadline = time.monotonic() + 60
+            while not directory.ready and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+
+            user = (await stub.get("/api/v1/users/1.json")).json()["users"]["1"]
+            workspace = (await stub.get("/api/v1/workspaces/1.json")).json()["workspaces"]["1"]
+            story = (await stub.get("/api/v1/stories/1.json")).json()["stories"]["1"]
+            names = {"user": user["full_name"], "workspace": workspace["title"],
+                     "workspace_id": workspace["id"], "story": story["title"]}
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://mcp", timeout=600) as client:
+                async def run_once(method: str, path: str, body: dict | None) -> tuple[float, float | None, int]:
+                    """Serve one request from cold caches.
+
+                    Returns its latency (ms), the time to its first event (ms,
+                    streams only) and the upstream calls it made.
+                    """
+                    await client.post("/admin/cache/flush")
+                    await stub.post("/__reset")
+                    started = time.perf_counter()
+                    if path.endswith("/stream"):
+                        status, text, first_event = await stream_asgi(app, path, body)
+                    else:
+                        r = await client.request(method, path, json=body)
+                        status, text, first_event = r.status_code, r.text, None
+                    elapsed = (time.perf_counter() - started) * 1000
+                    if status >= 400:
+                        raise RuntimeError(f"{method} {path} returned {status}: {text[:200]}")
+                    return elapsed, first_event, sum((await stub.get("/__stats")).json().values())
+
+                for name, method, path, body in scenarios(names):
+                    timings, first_events, calls = [], [], []
+                    runs = args.repeat
+                    while len(timings) < runs:
+                        elapsed, first_event, upstream_calls = await run_once(method, path, body)
+                        timings.append(elapsed)
+                        if first_event is not None:
+                            first_events.append(first_event)
+                        calls.append(upstream_calls)
+                        if len(timings) == args.repeat and statistics.median(timings) < FAST_MS:
+                            runs = max(runs, FAST_RUNS)
+
+                    tracemalloc.start()
+                    try:
+                        baseline = tracemalloc.get_traced_memory()[0]
+                        tracemalloc.reset_peak()
+                        await run_once(method, path, body)
+                        peak = tracemalloc.get_traced_memory()[1] - baseline
+                    finally:
+                        tracemalloc.stop()
+
+                    timings.sort()
+                    results[name] = {
+                        "p50_ms": round(statistics.median(timings), 1),
+                        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 1),
+                        "upstream_calls": max(calls),
+                        "peak_kib": round(peak / 1024),
+                    }
+                    if first_events:
+                        results[name]["first_event_ms"] = round(statistics.median(first_events), 1)
+    finally:
+        fake.terminate()
+        fake.wait()
+    return results
+
+
+def allowance(metric: str, limit: float, tolerance: float) -> float:
+    """Largest value of ``metric`` that does not count as a regression against ``limit``."""
+    if metric == "upstream_calls":
+        return limit
+    return limit * (1 + tolerance) + SLACK[metric]
+
+
+def check(results: dict, thresholds: dict, tolerance: float) -> list[str]:
+    """Describe every metric that is worse than its threshold."""
+    regressions = []
+    for size, size_results in results.items():
+        for scenario, measured in size_results.items():
+            limits = thresholds.get(size, {}).get(scenario, {})
+            for metric in METRICS:
+                if metric not in limits or metric not in measured:
+                    continue
+                allowed = allowance(metric, limits[metric], tolerance)
+                if measured[metric] > allowed:
+                    regressions.append(
+                        f"{size} entries / {scenario}: {metric} {measured[metric]} > {limits[metric]}"
+                    )
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    lines = []
+    for size, size_results in results.items():
+        lines.append(f"{int(size):,} entries")
+        lines.append(
+            f"  {'scenario':<20} {'p50 ms':>9} {'p95 ms':>9} {'first ms':>9} {'upstream':>9} {'peak KiB':>9}"
+        )
+        for scenario, measured in size_results.items():
+            lines.append(
+                f"  {scenario:<20} {measured['p50_ms']:>9} {measured['p95_ms']:>9} "
+                f"{measured.get('first_event_ms', '-'):>9} {measured['upstream_calls']:>9} {measured['peak_kib']:>9}"
+            )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated dataset sizes (time entries)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per scenario")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake upstream latency (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="fake upstream jitter (± seconds)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the client-side rate limiter enabled")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed latency/memory excess over a threshold (0.5 = 50%%)")
+    parser.add_argument("--thresholds", type=Path, default=THRESHOLDS_PATH)
+    parser.add_argument("--update-thresholds", action="store_true", help="save these results as the thresholds")
+    parser.add_argument("--output", type=Path, help="also write the results as JSON")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # One size per interpreter: the server reads its configuration at
+        # import time, and peak memory should not carry over between sizes
+        print(json.dumps(asyncio.run(benchmark_size(args, args.child))))
+        return
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        child_args = [arg for arg in sys.argv[1:] if arg != "--update-thresholds"]
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", *child_args, "--child", str(size)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        if proc.returncode != 0:
+            sys.exit(f"benchmark for {size} entries failed")
+        results[str(size)] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(format_results({str(size): results[str(size)]}), flush=True)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.update_thresholds:
+        thresholds = json.loads(args.thresholds.read_text()) if args.thresholds.exists() else {}
+        for size, size_results in results.items():
+            thresholds[size] = {
+                scenario: {metric: measured[metric] for metric in METRICS if metric in measured}
+                for scenario, measured in size_results.items()
+            }
+        args.thresholds.write_text(json.dumps(thresholds, indent=2) + "\n")
+        print(f"Thresholds written to {args.thresholds}")
+        return
+
+    thresholds = json.loads(args.thresholds.read_text()) if args.thresholds.exists() else {}
+    regressions = check(results, thresholds, args.tolerance)
+    if regressions:
+        print("\nRegressions:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    print("\nNo regressions against", args.thresholds)
+
+
+if __name__ == "__main__":
+    main()
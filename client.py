@@ -1,6 +1,7 @@
-import os, json, sys, requests, openai, readline
+import os, json, sys, readline
 from dotenv import load_dotenv
 from tools import schemas as functions
+from conversation import ConversationContext
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,24 +17,41 @@ if not os.getenv("OPENAI_API_KEY"):
 
 # ---------------- OpenAI function schema -----------------
 
-messages=[{"role":"system",
-           "content":"You are an assistant that logs time to Kantata OX. When users mention 'today', 'today's date', or similar phrases, always use 'today' as the date parameter. When no specific date is mentioned, default to 'today'. Always extract the date parameter from the user's request and include it in the function call."}]
+SYSTEM_PROMPT = "You are an assistant that logs time to Kantata OX. When users mention 'today', 'today's date', or similar phrases, always use 'today' as the date parameter. When no specific date is mentioned, default to 'today'. Always extract the date parameter from the user's request and include it in the function call."
 
-# Initialize OpenAI client
-client = openai.OpenAI()
+# Rolling, token-budgeted history: old turns are digested and old tool
+# results shrink to their key fields instead of being resent in full
+context = ConversationContext(
+    SYSTEM_PROMPT,
+    max_turns=int(os.getenv("KANTATA_CLIENT_CONTEXT_TURNS", "8")),
+    token_budget=int(os.getenv("KANTATA_CLIENT_TOKEN_BUDGET", "6000")),
+    detail_chars=int(os.getenv("KANTATA_CLIENT_DETAIL_CHARS", "8000")),
+)
+
+# OpenAI client, created on first use: importing openai and requests takes
+# longer than everything else here, so defer it until the first message
+client = None
+
+def get_client():
+    global client
+    if client is None:
+        import openai
+        client = openai.OpenAI()
+    return client
 
 def chat(user_input:str):
-    messages.append({"role":"user","content":user_input})
-    resp = client.chat.completions.create(
+    import requests
+    context.add_user(user_input)
+    resp = get_client().chat.completions.create(
         model="gpt-4o-mini",
-        messages=messages,
+        messages=context.messages(),
         tools=functions,
         tool_choice="auto"
     )
     msg = resp.choices[0].message
     
     # Add the assistant's message to the conversation history
-    messages.append(msg)
+    context.add_assistant(msg)
     
     if msg.tool_calls:
         tool_call = msg.tool_calls[0]
@@ -43,45 +61,65 @@ def chat(user_input:str):
         # Handle different tool types
         if tool_call.function.name == "query_time_entries":
             # Handle time entry queries - no confirmation needed
+            # Stream week blocks as they arrive instead of waiting for the full table
             try:
-                r = requests.post("http://localhost:8000/query_time_entries", json=args, timeout=60)
-                if r.ok:
-                    res = r.json()
-                    print("\n" + "="*80)
-                    print("📊 TIME ENTRIES QUERY RESULTS")
-                    print("="*80)
-                    print(res['formatted_output'])
-                    print("="*80)
-                    messages.append({"role":"tool",
-                                     "tool_call_id": tool_call.id,
-                                     "name": tool_call.function.name,
-                                     "content": json.dumps(res)})
-                else:
-                    print("❌ MCP error:", r.text)
+                with requests.post("http://localhost:8000/query_time_entries/stream",
+                                   json=args, timeout=(10, 60), stream=True) as r:
+                    if r.ok:
+                        res = {"status": "success"}
+                        blocks = []
+                        weeks = []
+                        print("\n" + "="*80)
+                        print("📊 TIME ENTRIES QUERY RESULTS")
+                        print("="*80)
+                        for line in r.iter_lines(decode_unicode=True):
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            if event["type"] == "start":
+                                res.update({k: event[k] for k in ("time_period", "start_date", "end_date")})
+                            elif event["type"] in ("week", "summary"):
+                                print(event["formatted_output"], flush=True)
+                                blocks.append(event["formatted_output"])
+                                if event["type"] == "week":
+                                    weeks.append({k: event[k] for k in ("week_start", "entries", "hours", "billable_hours")})
+                                else:
+                                    res.update({k: event[k] for k in ("total_entries", "total_hours", "billable_hours")})
+                                    res["truncated"] = event.get("truncated", False)
+                            elif event["type"] == "error":
+                                res["status"] = "error"
+                                res["error"] = event["detail"]
+                                print("❌ MCP error:", event["detail"])
+                        print("="*80)
+                        # Keep per-week totals as structured data; the rendered
+                        # table is only sent while it is the latest result
+                        if weeks:
+                            res["weeks"] = weeks
+                        context.add_tool_result(tool_call.id, tool_call.function.name, res, "\n".join(blocks))
+                    else:
+                        print("❌ MCP error:", r.text)
+                        context.add_tool_result(tool_call.id, tool_call.function.name,
+                                                {"status": "error", "error": r.text[:500]})
             except Exception as e:
                 print(f"❌ Error querying time entries: {e}")
+                context.add_tool_result(tool_call.id, tool_call.function.name, {"status": "error", "error": str(e)})
                 
         elif tool_call.function.name == "log_time_entry_by_name":
             # Show confirmation screen for time entry creation
             # Fetch actual names and IDs for confirmation
+            draft_token = None
             try:
-                # Get user details
-                user_response = requests.get(f"http://localhost:8000/lookup/user/{args.get('user_name', '')}", timeout=10)
-                user_data = user_response.json() if user_response.ok else {"user_id": "N/A", "name": args.get('user_name', 'N/A')}
-                
-                # Get project details
-                project_response = requests.get(f"http://localhost:8000/lookup/workspace/{args.get('project_name', '')}", timeout=10)
-                project_data = project_response.json() if project_response.ok else {"workspace_id": "N/A", "name": args.get('project_name', 'N/A')}
-                
-                # Get task details if provided
-                task_data = None
-                if args.get('task_name'):
-                    task_response = requests.get(f"http://localhost:8000/lookup/story/{project_data.get('workspace_id', 'N/A')}/{args.get('task_name', '')}", timeout=10)
-                    task_data = task_response.json() if task_response.ok else {"story_id": "N/A", "name": args.get('task_name', 'N/A')}
-                
-                # Resolve the actual date
-                date_response = requests.post("http://localhost:8000/resolve_date", json={"date": args.get('date', 'today')}, timeout=10)
-                resolved_date = date_response.json().get('resolved_date', args.get('date', 'N/A')) if date_response.ok else args.get('date', 'N/A')
+                # Resolve user, project, task and date in one round trip; the
+                # returned draft is posted as-is if the user confirms
+                prepare_response = requests.post("http://localhost:8000/time_entry/prepare", json=args, timeout=10)
+                if not prepare_response.ok:
+                    raise RuntimeError(prepare_response.json().get("detail", prepare_response.text))
+                draft = prepare_response.json()
+                draft_token = draft["draft_token"]
+                user_data = draft["user"]
+                project_data = draft["project"]
+                task_data = draft["task"]
+                resolved_date = draft["date"]
                 
                 print("\n" + "="*60)
                 print("📋 TIME ENTRY CONFIRMATION")
@@ -146,12 +184,17 @@ def chat(user_input:str):
             
             if confirmation in ['yes', 'y', 'confirm', 'ok', 'proceed', 'yup', 'yeah', 'sure', 'go ahead']:
                 # Proceed with the time entry
+                payload = args
                 if tool_call.function.name == "log_time_entry_by_name":
-                    endpoint = "http://localhost:8000/time_entry_by_name"
+                    if draft_token:
+                        endpoint = "http://localhost:8000/time_entry/commit"
+                        payload = {"draft_token": draft_token}
+                    else:
+                        endpoint = "http://localhost:8000/time_entry_by_name"
                 else:
                     endpoint = MCP_URL
                     
-                r = requests.post(endpoint, json=args, timeout=10)
+                r = requests.post(endpoint, json=payload, timeout=10)
                 if r.ok:
                     res = r.json()
                     if tool_call.function.name == "log_time_entry_by_name":
@@ -165,21 +208,19 @@ def chat(user_input:str):
                         print(f"✅ Logged {res['minutes']} min "
                               f"on {res['date']} for user {res['user_id']} "
                               f"(entry #{res['entry_id']})")
-                    messages.append({"role":"tool",
-                                     "tool_call_id": tool_call.id,
-                                     "name": tool_call.function.name,
-                                     "content": json.dumps(res)})
+                    context.add_tool_result(tool_call.id, tool_call.function.name, res)
                 else:
                     print("❌ MCP error:", r.text)
+                    context.add_tool_result(tool_call.id, tool_call.function.name,
+                                            {"status": "error", "error": r.text[:500]})
             elif confirmation in ['no', 'n', 'cancel', 'abort', 'stop']:
                 print("❌ Time entry cancelled.")
+                context.add_tool_result(tool_call.id, tool_call.function.name, {"status": "cancelled"})
             else:
                 # Handle corrections - restart the conversation to avoid state corruption
                 print(f"🔄 Processing correction: '{confirmation}'")
                 # Clear the conversation and start fresh with the correction
-                messages.clear()
-                messages.append({"role":"system",
-                               "content":"You are an assistant that logs time to Kantata OX. When users mention 'today', 'today's date', or similar phrases, always use 'today' as the date parameter. When no specific date is mentioned, default to 'today'. Always extract the date parameter from the user's request and include it in the function call."})
+                context.reset()
                 correction_msg = f"Please correct the time entry: {confirmation}"
                 chat(correction_msg)
     else:
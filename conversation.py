@@ -0,0 +1,184 @@
+"""Bounded conversation history for the chat client.
+
+Every completion request used to resend the whole session, including each
+rendered time entry table, so turns got slower and more expensive as the
+session went on.  ConversationContext keeps the history in turns (a user
+message plus the assistant and tool messages that follow it) and builds
+each request from:
+
+- the system prompt
+- a short digest of turns that fell out of the window
+- the most recent turns that fit the token budget
+
+Tool results are stored as compact structured payloads.  Rendered output
+(the table the user already saw) is kept only for the latest result, and
+older results shrink to their scalar fields.  Token counts are estimated
+from JSON length, which is close enough for budgeting and needs no
+tokenizer.
+"""
+import json
+
+CHARS_PER_TOKEN = 4
+DIGEST_TURNS = 10
+DIGEST_TEXT_CHARS = 80
+
+
+def estimate_tokens(message: dict) -> int:
+    return len(json.dumps(message, ensure_ascii=False)) // CHARS_PER_TOKEN + 4
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _scalars(payload: dict) -> dict:
+    return {key: value for key, value in payload.items() if not isinstance(value, (dict, list))}
+
+
+def _assistant_message(message) -> dict:
+    """An OpenAI ChatCompletionMessage (or dict) as a plain request message."""
+    if isinstance(message, dict):
+        return message
+    result = {"role": "assistant", "content": message.content}
+    if message.tool_calls:
+        result["tool_calls"] = [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments},
+            }
+            for call in message.tool_calls
+        ]
+    return result
+
+
+class ToolResult:
+    """A tool call's structured payload plus optional rendered detail."""
+
+    def __init__(self, tool_call_id: str, name: str, payload: dict, detail: str | None = None):
+        self.tool_call_id = tool_call_id
+        self.name = name
+        self.payload = payload
+        self.detail = detail
+
+    def message(self, full: bool, detail_chars: int) -> dict:
+        """The tool message: full payload and detail for the latest result, scalars otherwise."""
+        content = dict(self.payload) if full else _scalars(self.payload)
+        if full and self.detail:
+            content["formatted_output"] = self.detail if len(self.detail) <= detail_chars else (
+                self.detail[:detail_chars] + "\n… (cut to fit the conversation; the user saw the full output)"
+            )
+        return {
+            "role": "tool",
+            "tool_call_id": self.tool_call_id,
+            "name": self.name,
+            "content": json.dumps(content, ensure_ascii=False),
+        }
+
+    def digest(self) -> str:
+        fields = ", ".join(f"{key}={value}" for key, value in _scalars(self.payload).items() if value is not None)
+        return f"{self.name}: {_clip(fields, DIGEST_TEXT_CHARS * 2)}"
+
+
+class ConversationContext:
+    """Rolling, token-budgeted chat history.
+
+    ``max_turns`` bounds how many turns are sent verbatim and
+    ``token_budget`` bounds the estimated size of each request.  The
+    latest turn is always sent, whatever its size.
+    """
+
+    def __init__(self, system_prompt: str, max_turns: int = 8, token_budget: int = 6000, detail_chars: int = 8000):
+        self.system_prompt = system_prompt
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.detail_chars = detail_chars
+        self.turns: list[list] = []
+        self.dropped = 0
+
+    def reset(self) -> None:
+        self.turns.clear()
+        self.dropped = 0
+
+    def add_user(self, content: str) -> None:
+        self.turns.append([{"role": "user", "content": content}])
+        # Turns past the window are never sent again except as a digest,
+        # so keep only what the digest needs
+        excess = len(self.turns) - max(self.max_turns, DIGEST_TURNS)
+        if excess > 0:
+            del self.turns[:excess]
+            self.dropped += excess
+
+    def add_assistant(self, message) -> None:
+        self._current().append(_assistant_message(message))
+
+    def add_tool_result(self, tool_call_id: str, name: str, payload: dict, detail: str | None = None) -> None:
+        self._current().append(ToolResult(tool_call_id, name, payload, detail))
+
+    def _current(self) -> list:
+        if not self.turns:
+            self.turns.append([])
+        return self.turns[-1]
+
+    def _render_turn(self, turn: list, latest_result) -> list[dict]:
+        """Request messages for a turn; every tool call gets a result message."""
+        messages = []
+        answered = {item.tool_call_id for item in turn if isinstance(item, ToolResult)}
+        for item in turn:
+            if isinstance(item, ToolResult):
+                messages.append(item.message(item is latest_result, self.detail_chars))
+                continue
+            messages.append(item)
+            for call in item.get("tool_calls") or ():
+                if call["id"] not in answered:
+                    # Cancelled or failed calls still need a result, or the API rejects the history
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": call["id"],
+                        "name": call["function"]["name"],
+                        "content": json.dumps({"status": "no_result"}),
+                    })
+        return messages
+
+    def _digest(self, turns: list[list]) -> dict | None:
+        lines = []
+        for turn in turns[-DIGEST_TURNS:]:
+            for item in turn:
+                if isinstance(item, ToolResult):
+                    lines.append(f"- {item.digest()}")
+                elif item["role"] == "user":
+                    lines.append(f"- user: {_clip(item['content'], DIGEST_TEXT_CHARS)}")
+        omitted = self.dropped + len(turns)
+        if not omitted:
+            return None
+        header = f"Earlier in this session ({omitted} turns omitted, most recent shown):"
+        return {"role": "system", "content": "\n".join([header, *lines])}
+
+    def messages(self) -> list[dict]:
+        """Messages for the next completion request."""
+        latest_result = None
+        for turn in reversed(self.turns):
+            latest_result = next((item for item in reversed(turn) if isinstance(item, ToolResult)), None)
+            if latest_result is not None:
+                break
+
+        system = {"role": "system", "content": self.system_prompt}
+        budget = self.token_budget - estimate_tokens(system)
+        kept: list[list[dict]] = []
+        for index in range(len(self.turns) - 1, -1, -1):
+            if len(kept) >= self.max_turns:
+                break
+            rendered = self._render_turn(self.turns[index], latest_result)
+            cost = sum(estimate_tokens(message) for message in rendered)
+            if kept and cost > budget:
+                break
+            kept.append(rendered)
+            budget -= cost
+
+        older = self.turns[:len(self.turns) - len(kept)]
+        digest = self._digest(older)
+        messages = [system] + ([digest] if digest else [])
+        for rendered in reversed(kept):
+            messages.extend(rendered)
+        return messages
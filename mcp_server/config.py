@@ -1,9 +1,89 @@
 """Shared configuration for MCP server."""
 import os
+from datetime import date
 from dotenv import load_dotenv
 
 load_dotenv()
 
-BASE_URL = "https://api.mavenlink.com/api/v1"
+BASE_URL = os.getenv("KANTATA_BASE_URL", "https://api.mavenlink.com/api/v1")
 TOKEN = os.getenv("KANTATA_API_TOKEN")
 HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+# Connection pool settings for the shared Kantata HTTP client
+HTTP_MAX_CONNECTIONS = int(os.getenv("KANTATA_HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("KANTATA_HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("KANTATA_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP2 = os.getenv("KANTATA_HTTP2", "false").lower() in ("1", "true", "yes")
+HTTP_WARMUP_CONNECTIONS = int(os.getenv("KANTATA_HTTP_WARMUP_CONNECTIONS", "2"))
+
+# Per-endpoint request timeouts (seconds), matched on path prefix
+HTTP_TIMEOUTS = {
+    "/time_entries.json": 60.0,
+    "/users/": 30.0,
+    "/workspaces/": 30.0,
+    "/stories/": 30.0,
+}
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("KANTATA_HTTP_TIMEOUT", "10"))
+
+# Name lookup cache (users, workspaces, stories)
+LOOKUP_CACHE_SIZE = int(os.getenv("KANTATA_LOOKUP_CACHE_SIZE", "1024"))
+LOOKUP_CACHE_TTL = float(os.getenv("KANTATA_LOOKUP_CACHE_TTL", "900"))
+LOOKUP_CACHE_NEGATIVE_TTL = float(os.getenv("KANTATA_LOOKUP_CACHE_NEGATIVE_TTL", "60"))
+
+# Local directory of users/workspaces/stories used for name resolution
+DIRECTORY_SYNC_INTERVAL = float(os.getenv("KANTATA_DIRECTORY_SYNC_INTERVAL", "900"))  # 0 disables
+DIRECTORY_MIN_SCORE = float(os.getenv("KANTATA_DIRECTORY_MIN_SCORE", "0.35"))
+
+# Maximum concurrent page requests when fanning out a paginated fetch
+PAGE_CONCURRENCY = int(os.getenv("KANTATA_PAGE_CONCURRENCY", "6"))
+# Pages in flight or buffered across all date windows of one sharded fetch
+PAGE_READAHEAD = int(os.getenv("KANTATA_PAGE_READAHEAD", "16"))
+
+# Date-range sharding for wide time entry queries
+SHARD_THRESHOLD_DAYS = int(os.getenv("KANTATA_SHARD_THRESHOLD_DAYS", "45"))
+SHARD_TARGET_ENTRIES = int(os.getenv("KANTATA_SHARD_TARGET_ENTRIES", "1000"))
+# Process-wide cap on concurrent /time_entries.json requests
+TIME_ENTRY_CONCURRENCY = int(os.getenv("KANTATA_TIME_ENTRY_CONCURRENCY", "8"))
+# Time entries held in memory before a spool spills to a temp file (0 never spills)
+ENTRY_MEMORY_BUDGET = int(os.getenv("KANTATA_ENTRY_MEMORY_BUDGET", "50000"))
+
+# Local SQLite replica of time entries (disabled when no path is set)
+REPLICA_PATH = os.getenv("KANTATA_REPLICA_PATH", "")
+REPLICA_SINCE = os.getenv("KANTATA_REPLICA_SINCE", f"{date.today().year - 1}-01-01")
+REPLICA_SYNC_INTERVAL = float(os.getenv("KANTATA_REPLICA_SYNC_INTERVAL", "300"))
+REPLICA_FULL_SYNC_INTERVAL = float(os.getenv("KANTATA_REPLICA_FULL_SYNC_INTERVAL", "86400"))
+REPLICA_MAX_AGE = float(os.getenv("KANTATA_REPLICA_MAX_AGE", "900"))
+# Delay before the delta sync that follows writes, so a burst shares one sync
+REPLICA_WRITE_SYNC_DELAY = float(os.getenv("KANTATA_REPLICA_WRITE_SYNC_DELAY", "1"))
+# Entries read from the replica per page when a query or export is served locally
+REPLICA_PAGE_SIZE = int(os.getenv("KANTATA_REPLICA_PAGE_SIZE", "1000"))
+
+# Resolved /query_time_entries results
+QUERY_CACHE_SIZE = int(os.getenv("KANTATA_QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_TTL = float(os.getenv("KANTATA_QUERY_CACHE_TTL", "120"))
+# Hard cap on formatted_output (characters); longer results are cut and marked truncated
+QUERY_MAX_OUTPUT_CHARS = int(os.getenv("KANTATA_QUERY_MAX_OUTPUT_CHARS", "20000"))
+
+# Batch time entry creation
+BATCH_MAX_ENTRIES = int(os.getenv("KANTATA_BATCH_MAX_ENTRIES", "100"))
+BATCH_CONCURRENCY = int(os.getenv("KANTATA_BATCH_CONCURRENCY", "4"))
+
+# Deadline (seconds) for resolving user/project/task names in one request
+RESOLVE_DEADLINE = float(os.getenv("KANTATA_RESOLVE_DEADLINE", "15"))
+
+# Prepared (resolved but not yet posted) time entry drafts
+DRAFT_TTL = float(os.getenv("KANTATA_DRAFT_TTL", "600"))
+DRAFT_CACHE_SIZE = int(os.getenv("KANTATA_DRAFT_CACHE_SIZE", "1024"))
+
+# Logging
+LOG_LEVEL = os.getenv("KANTATA_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("KANTATA_LOG_FORMAT", "text").lower()  # "text" or "json"
+
+# Upstream throttling: token bucket + AIMD adaptive concurrency
+RATE_LIMIT_PER_SECOND = float(os.getenv("KANTATA_RATE_LIMIT_PER_SECOND", "10"))  # 0 disables the bucket
+RATE_LIMIT_BURST = int(os.getenv("KANTATA_RATE_LIMIT_BURST", "20"))
+ADAPTIVE_MIN_CONCURRENCY = int(os.getenv("KANTATA_ADAPTIVE_MIN_CONCURRENCY", "1"))
+ADAPTIVE_MAX_CONCURRENCY = int(os.getenv("KANTATA_ADAPTIVE_MAX_CONCURRENCY", "16"))
+RETRY_MAX_ATTEMPTS = int(os.getenv("KANTATA_RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("KANTATA_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("KANTATA_RETRY_MAX_DELAY", "30"))
@@ -0,0 +1,310 @@
+"""Natural-language date and period resolution shared by every handler.
+
+The grammar is a fixed set of precompiled patterns rather than fuzzy
+parsing, so input it does not recognise raises DateParseError instead of
+quietly becoming today.  Results are memoized per input; the memo is
+dropped whenever the local date changes, because "today" and "last week"
+move at midnight.
+"""
+import calendar
+import re
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sep": 9, "sept": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3, "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5, "sunday": 6, "sun": 6,
+}
+NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+SUPPORTED_PERIODS = (
+    "'today', 'this week', 'last month', 'last 3 weeks', 'Q2 2025', 'june 2025', "
+    "'since monday', '2025-06-01 to 2025-06-30', etc."
+)
+
+MEMO_SIZE = 1024
+
+
+class DateParseError(ValueError):
+    """Raised for input outside the supported date/period grammar."""
+
+
+class _Unrecognized(DateParseError):
+    """Input that matches no pattern, as opposed to a matched but invalid date."""
+
+
+def _alternation(words) -> str:
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+_MONTH = rf"(?P<month>{_alternation(MONTHS)})\.?"
+_WEEKDAY = rf"(?P<weekday>{_alternation(WEEKDAYS)})"
+_COUNT = rf"(?P<count>\d+|{_alternation(NUMBERS)})"
+_UNIT = r"(?P<unit>day|week|month|quarter|year)s?"
+_DAY = r"(?P<day>\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?P<year>\d{4})"
+
+# Single dates
+_ISO = re.compile(
+    r"(?P<year>\d{4})-(?P<month>\d{1,2})-(?P<day>\d{1,2})"
+    r"(?:[t ]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})?)?"
+)
+_YMD_SLASH = re.compile(r"(?P<year>\d{4})/(?P<month>\d{1,2})/(?P<day>\d{1,2})")
+_MDY_SLASH = re.compile(r"(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})")
+_AGO = re.compile(rf"{_COUNT} {_UNIT} ago")
+_WEEKDAY_REL = re.compile(rf"(?:(?P<rel>last|this|next|past|on) )?{_WEEKDAY}")
+_MONTH_DAY = re.compile(rf"{_MONTH} {_DAY}(?: {_YEAR})?")
+_DAY_MONTH = re.compile(rf"(?:the )?{_DAY} (?:of )?{_MONTH}(?: {_YEAR})?")
+
+# Periods
+_RELATIVE_PERIOD = re.compile(r"(?P<rel>this|current|last|past|previous|next) (?P<unit>week|month|quarter|year)")
+_TRAILING = re.compile(rf"(?:last|past|previous) {_COUNT} {_UNIT}")
+_QUARTER = re.compile(r"q(?P<quarter>[1-4])(?: (?P<year>\d{4}))?|(?P<year2>\d{4}) q(?P<quarter2>[1-4])")
+_MONTH_YEAR = re.compile(rf"{_MONTH}(?: {_YEAR})?")
+_YEAR_ONLY = re.compile(_YEAR)
+_ISO_MONTH = re.compile(r"(?P<year>\d{4})-(?P<month>\d{1,2})")
+_HAS_YEAR = re.compile(r"\b\d{4}\b")
+_WEEK_OF = re.compile(r"(?:the )?week of (?P<rest>.+)")
+_SINCE = re.compile(r"(?:since|after|from) (?P<rest>.+)")
+_RANGE = (
+    re.compile(r"(?:between|from) (?P<start>.+?) (?:and|to|through|thru|until|till) (?P<end>.+)"),
+    re.compile(r"(?P<start>.+?) (?:to|through|thru|until|till|-) (?P<end>.+)"),
+)
+_TO_DATE = {"ytd": "year", "year to date": "year", "mtd": "month", "month to date": "month",
+            "wtd": "week", "week to date": "week"}
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).lower().replace(",", " ").split())
+
+
+def _count(value: str) -> int:
+    return int(value) if value.isdigit() else NUMBERS[value]
+
+
+def _make_date(year: int, month: int, day: int) -> date:
+    try:
+        return date(year, month, day)
+    except ValueError as e:
+        raise DateParseError(f"Invalid date: {year}-{month:02d}-{day:02d} ({e})") from None
+
+
+def _add_days(day: date, days: int) -> date:
+    try:
+        return day + timedelta(days=days)
+    except OverflowError:
+        raise DateParseError(f"Date out of range: {day.isoformat()} {days:+d} days") from None
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    if not MINYEAR <= year <= MAXYEAR:
+        raise DateParseError(f"Date out of range: {day.isoformat()} {months:+d} months")
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    first = _make_date(year, month, 1)
+    return first, first.replace(day=calendar.monthrange(year, month)[1])
+
+
+def _quarter_bounds(year: int, quarter: int) -> tuple[date, date]:
+    return _month_bounds(year, 3 * quarter - 2)[0], _month_bounds(year, 3 * quarter)[1]
+
+
+def _unit_bounds(unit: str, day: date) -> tuple[date, date]:
+    """The calendar week/month/quarter/year containing ``day``."""
+    if unit == "week":
+        monday = _add_days(day, -day.weekday())
+        return monday, _add_days(monday, 6)
+    if unit == "month":
+        return _month_bounds(day.year, day.month)
+    if unit == "quarter":
+        return _quarter_bounds(day.year, (day.month - 1) // 3 + 1)
+    return date(day.year, 1, 1), date(day.year, 12, 31)
+
+
+def _shift(day: date, unit: str, count: int) -> date:
+    if unit == "day":
+        return _add_days(day, count)
+    if unit == "week":
+        return _add_days(day, 7 * count)
+    months = {"month": 1, "quarter": 3, "year": 12}[unit]
+    return _add_months(day, months * count)
+
+
+def _parse_date(text: str, today: date) -> date:
+    if text in ("today", "now"):
+        return today
+    if text == "yesterday":
+        return _add_days(today, -1)
+    if text == "tomorrow":
+        return _add_days(today, 1)
+
+    match = _ISO.fullmatch(text) or _YMD_SLASH.fullmatch(text)
+    if match:
+        return _make_date(int(match["year"]), int(match["month"]), int(match["day"]))
+    match = _MDY_SLASH.fullmatch(text)
+    if match:
+        year = int(match["year"])
+        return _make_date(year + 2000 if year < 100 else year, int(match["month"]), int(match["day"]))
+
+    match = _AGO.fullmatch(text)
+    if match:
+        return _shift(today, match["unit"], -_count(match["count"]))
+
+    match = _WEEKDAY_REL.fullmatch(text)
+    if match:
+        weekday = WEEKDAYS[match["weekday"]]
+        rel = match["rel"]
+        if rel == "this":
+            return _add_days(today, weekday - today.weekday())
+        if rel == "next":
+            return _add_days(today, (weekday - today.weekday() - 1) % 7 + 1)
+        if rel == "last":
+            return _add_days(today, -((today.weekday() - weekday - 1) % 7 + 1))
+        # Bare weekday: the most recent one, today included
+        return _add_days(today, -((today.weekday() - weekday) % 7))
+
+    match = _MONTH_DAY.fullmatch(text) or _DAY_MONTH.fullmatch(text)
+    if match:
+        year = int(match["year"]) if match["year"] else today.year
+        return _make_date(year, MONTHS[match["month"]], int(match["day"]))
+
+    raise _Unrecognized(f"Unrecognized date: {text!r}")
+
+
+def _parse_simple_period(text: str, today: date) -> tuple[date, date]:
+    """Periods that are not ranges or open-ended ("since ...")."""
+    if text in _TO_DATE:
+        return _unit_bounds(_TO_DATE[text], today)[0], today
+
+    match = _RELATIVE_PERIOD.fullmatch(text)
+    if match:
+        offset = {"last": -1, "past": -1, "previous": -1, "next": 1}.get(match["rel"], 0)
+        return _unit_bounds(match["unit"], _shift(today, match["unit"], offset))
+
+    match = _TRAILING.fullmatch(text)
+    if match:
+        # The last N units ending today, e.g. "last 3 weeks" is the 21 days up to today
+        return _add_days(_shift(today, match["unit"], -_count(match["count"])), 1), today
+
+    match = _QUARTER.fullmatch(text)
+    if match:
+        quarter = int(match["quarter"] or match["quarter2"])
+        year = match["year"] or match["year2"]
+        return _quarter_bounds(int(year) if year else today.year, quarter)
+
+    match = _MONTH_YEAR.fullmatch(text)
+    if match:
+        return _month_bounds(int(match["year"]) if match["year"] else today.year, MONTHS[match["month"]])
+
+    match = _ISO_MONTH.fullmatch(text)
+    if match:
+        month = int(match["month"])
+        if not 1 <= month <= 12:
+            raise DateParseError(f"Invalid month: {text!r}")
+        return _month_bounds(int(match["year"]), month)
+
+    if _YEAR_ONLY.fullmatch(text):
+        return _month_bounds(int(text), 1)[0], _month_bounds(int(text), 12)[1]
+
+    match = _WEEK_OF.fullmatch(text)
+    if match:
+        return _unit_bounds("week", _parse_date(match["rest"], today))
+
+    day = _parse_date(text, today)
+    return day, day
+
+
+def _parse_period(text: str, today: date) -> tuple[date, date]:
+    try:
+        return _parse_simple_period(text, today)
+    except DateParseError as e:
+        error = e
+
+    match = _SINCE.fullmatch(text)
+    if match:
+        try:
+            return _parse_simple_period(match["rest"], today)[0], today
+        except DateParseError:
+            pass
+
+    for pattern in _RANGE:
+        match = pattern.fullmatch(text)
+        if match:
+            start_text, end_text = match["start"], match["end"]
+            candidates = [start_text]
+            # "may to july 2025": a start without a year borrows the end's
+            year = _HAS_YEAR.search(end_text)
+            if year and not _HAS_YEAR.search(start_text):
+                candidates.insert(0, f"{start_text} {year.group()}")
+            try:
+                end = _parse_simple_period(end_text, today)[1]
+            except DateParseError:
+                continue
+            start = None
+            for candidate in candidates:
+                try:
+                    start = _parse_simple_period(candidate, today)[0]
+                    break
+                except DateParseError:
+                    pass
+            if start is None:
+                continue
+            if start > end:
+                raise DateParseError(f"Period starts after it ends: {text!r}")
+            return start, end
+
+    if not isinstance(error, _Unrecognized):
+        raise error  # e.g. "2025-02-30" or "0000": recognized, but not a valid date
+    raise DateParseError(f"Unrecognized time period: {text!r}. Supported formats: {SUPPORTED_PERIODS}")
+
+
+_memo: dict = {}
+_memo_day: date | None = None
+
+
+def _memoized(kind: str, text: str, parse):
+    global _memo_day
+    today = date.today()
+    if today != _memo_day:
+        _memo.clear()
+        _memo_day = today
+    key = (kind, _normalize(text))
+    result = _memo.get(key)
+    if result is None:
+        try:
+            result = parse(key[1], today)
+        except DateParseError as e:
+            result = e
+        if len(_memo) >= MEMO_SIZE:
+            _memo.clear()
+        _memo[key] = result
+    if isinstance(result, DateParseError):
+        raise DateParseError(str(result))
+    return result
+
+
+def resolve_date(text: str, today: date | None = None) -> date:
+    """Resolve a single day such as 'yesterday', 'last friday', 'june 5' or '2025-06-05'."""
+    if today is not None:
+        return _parse_date(_normalize(text), today)
+    return _memoized("date", text, _parse_date)
+
+
+def resolve_period(text: str, today: date | None = None) -> tuple[date, date]:
+    """Resolve a period such as 'last 3 weeks', 'Q2 2025' or 'since monday' to inclusive bounds."""
+    if today is not None:
+        return _parse_period(_normalize(text), today)
+    return _memoized("period", text, _parse_period)
@@ -0,0 +1,261 @@
+"""Local, background-synced directory of Kantata users, workspaces and stories.
+
+Names are indexed by token and by character trigram so lookups such as
+"john", "smith" or "big bend" are answered in-process with ranked matches
+instead of a round trip to Kantata's server-side ``search`` parameter.
+Resolving a name to one record (``NameIndex.best``) only accepts a match
+that is unambiguous; an unknown name falls back to Kantata's search, and
+an ambiguous one raises AmbiguousName.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from .config import DIRECTORY_SYNC_INTERVAL, DIRECTORY_MIN_SCORE
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trigrams(text: str) -> set[str]:
+    grams = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _near(token: str, name_token: str) -> bool:
+    """True if ``token`` is at most one edit (including a swap of adjacent
+    letters) from ``name_token``; only tokens of four or more letters."""
+    if min(len(token), len(name_token)) < 4 or abs(len(token) - len(name_token)) > 1:
+        return False
+    if len(token) == len(name_token):
+        diffs = [i for i, (a, b) in enumerate(zip(token, name_token)) if a != b]
+        if len(diffs) == 2 and diffs[1] == diffs[0] + 1:
+            i = diffs[0]
+            return token[i] == name_token[i + 1] and token[i + 1] == name_token[i]
+        return len(diffs) <= 1
+    short, long = sorted((token, name_token), key=len)
+    i = 0
+    while i < len(short) and short[i] == long[i]:
+        i += 1
+    return short[i:] == long[i + 1:]
+
+
+class AmbiguousName(Exception):
+    """Several directory records match a name about equally well."""
+
+    def __init__(self, candidates: list[str]):
+        super().__init__(", ".join(candidates))
+        self.candidates = candidates
+
+
+class NameIndex:
+    """Token + trigram index over a set of named records."""
+
+    def __init__(self, records: dict[str, tuple[str, dict]]):
+        # records: id -> (display name, raw Kantata record)
+        self.records = records
+        self._names: dict[str, str] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._trigram_index: dict[str, set[str]] = {}
+        self._token_index: dict[str, set[str]] = {}
+        for record_id, (name, _) in records.items():
+            normalized = _normalize(name)
+            grams = _trigrams(normalized)
+            self._names[record_id] = normalized
+            self._grams[record_id] = grams
+            for gram in grams:
+                self._trigram_index.setdefault(gram, set()).add(record_id)
+            for token in normalized.split():
+                self._token_index.setdefault(token, set()).add(record_id)
+        self._tokens = sorted(self._token_index)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[float, str]]:
+        """Return up to ``limit`` (score, id) pairs ranked best first."""
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+        query_tokens = normalized.split()
+        query_grams = _trigrams(normalized)
+
+        candidates = self._prefix_candidates(query_tokens)
+        if not candidates:
+            # No token-prefix hit (typos, partial words); rank by shared trigrams
+            overlap: Counter = Counter()
+            for gram in query_grams:
+                for record_id in self._trigram_index.get(gram, ()):
+                    overlap[record_id] += 1
+            candidates = [record_id for record_id, _ in overlap.most_common(max(limit * 10, 50))]
+
+        scored = []
+        for record_id in candidates:
+            name = self._names[record_id]
+            grams = self._grams[record_id]
+            shared = len(query_grams & grams)
+            similarity = shared / (len(query_grams) + len(grams) - shared) if grams else 0.0
+            name_tokens = name.split()
+            token_hits = sum(
+                1.0 if token in name_tokens
+                else 0.8 if any(t.startswith(token) for t in name_tokens)
+                else 0.5 if token in name
+                else 0.0
+                for token in query_tokens
+            )
+            token_score = token_hits / len(query_tokens)
+            score = 0.55 * token_score + 0.35 * similarity + (0.1 if normalized in name else 0.0)
+            if name == normalized:
+                score += 1.0
+            if score >= DIRECTORY_MIN_SCORE:
+                scored.append((round(score, 4), record_id))
+
+        scored.sort(key=lambda item: (-item[0], self._names[item[1]], item[1]))
+        return scored[:limit]
+
+    def _prefix_candidates(self, query_tokens: list[str]) -> set[str]:
+        """Ids whose names contain a token starting with every query token."""
+        candidates: set[str] | None = None
+        for token in query_tokens:
+            ids: set[str] = set()
+            position = bisect_left(self._tokens, token)
+            while position < len(self._tokens) and self._tokens[position].startswith(token):
+                ids |= self._token_index[self._tokens[position]]
+                position += 1
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def best(self, query: str) -> tuple[str, dict] | None:
+        """Return (id, raw record) for the one record ``query`` names, if any.
+
+        A record matches when every query token starts a word of its name
+        or is one typo away from one, so "jane smith" never resolves to John
+        Smith.  Several matches are ambiguous ("alex" among several Alexes,
+        "smith" with John Smith and Johnny Smithers) unless exactly one of
+        them is the full name.  Returns None when nothing matches; raises
+        AmbiguousName when several records do.
+        """
+        normalized = _normalize(query)
+        query_tokens = normalized.split()
+        prefix_ids = self._prefix_candidates(query_tokens)
+
+        def names_query(record_id: str) -> bool:
+            if record_id in prefix_ids:
+                return True
+            name_tokens = self._names[record_id].split()
+            return all(
+                any(t.startswith(token) or _near(token, t) for t in name_tokens)
+                for token in query_tokens
+            )
+
+        matches = [record_id for _, record_id in self.search(query, limit=10) if names_query(record_id)]
+        if len(matches) > 1:
+            exact = [record_id for record_id in matches if self._names[record_id] == normalized]
+            if len(exact) != 1:
+                raise AmbiguousName([self.records[record_id][0] for record_id in matches[:5]])
+            matches = exact
+        if not matches:
+            return None
+        return matches[0], self.records[matches[0]][1]
+
+
+class Directory:
+    """In-memory directory kept current by a periodic background sync."""
+
+    def __init__(self):
+        self.users = NameIndex({})
+        self.workspaces = NameIndex({})
+        self.stories: dict[int, NameIndex] = {}
+        self.synced_at: float | None = None
+        self._story_locks: dict[int, asyncio.Lock] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.synced_at is not None
+
+    async def sync(self) -> None:
+        """Reload users, workspaces and every story index already loaded."""
+        from .kantata import fetch_all, user_display_name
+
+        users, workspaces = await asyncio.gather(
+            fetch_all("/users.json", "users"),
+            fetch_all("/workspaces.json", "workspaces"),
+        )
+        self.users = NameIndex({
+            user_id: (user_display_name(data, ""), data) for user_id, data in users.items()
+        })
+        self.workspaces = NameIndex({
+            workspace_id: (data.get("title", ""), data) for workspace_id, data in workspaces.items()
+        })
+        await asyncio.gather(*(self.load_stories(workspace_id) for workspace_id in list(self.stories)))
+        self.synced_at = time.time()
+
+    async def load_stories(self, workspace_id: int) -> NameIndex:
+        from .kantata import fetch_all
+
+        stories = await fetch_all("/stories.json", "stories", {"workspace_id": workspace_id})
+        index = NameIndex({
+            story_id: (data.get("title", ""), data) for story_id, data in stories.items()
+        })
+        self.stories[workspace_id] = index
+        return index
+
+    async def story_index(self, workspace_id: int) -> NameIndex:
+        """Return the story index for a workspace, loading it on first use."""
+        workspace_id = int(workspace_id)
+        index = self.stories.get(workspace_id)
+        if index is not None:
+            return index
+        lock = self._story_locks.setdefault(workspace_id, asyncio.Lock())
+        async with lock:
+            index = self.stories.get(workspace_id)
+            if index is None:
+                index = await self.load_stories(workspace_id)
+        return index
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Directory sync failed: %s", e)
+            await asyncio.sleep(DIRECTORY_SYNC_INTERVAL)
+
+    def start(self) -> None:
+        if DIRECTORY_SYNC_INTERVAL > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "synced_at": self.synced_at,
+            "users": len(self.users),
+            "workspaces": len(self.workspaces),
+            "story_workspaces": len(self.stories),
+            "stories": sum(len(index) for index in self.stories.values()),
+        }
+
+
+directory = Directory()
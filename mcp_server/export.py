@@ -0,0 +1,180 @@
+"""Chunked encoders for bulk time entry exports.
+
+Each writer turns one page of TimeEntryRecords at a time into bytes, so an
+export can be streamed while pages are still arriving and never holds more
+than a page in memory.  ``write`` returns the bytes for a chunk (the CSV
+header comes with the first one) and ``close`` whatever trails the last
+chunk (the Parquet footer).  Parquet needs pyarrow, which is optional and
+imported only when a Parquet export is requested.
+"""
+import csv
+import io
+import json
+
+FIELDS = (
+    "id", "date", "user_id", "user_name", "project_id", "project_name", "task_id", "task_name",
+    "hours", "minutes", "billable", "notes", "updated_at",
+)
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def export_row(record) -> tuple:
+    """A TimeEntryRecord as a tuple of FIELDS values."""
+    return (
+        record.id,
+        record.date_performed,
+        record.user_id,
+        record.user_name,
+        record.workspace_id,
+        record.project_name,
+        record.story_id,
+        record.task_name,
+        record.time_in_minutes / 60,
+        record.time_in_minutes,
+        record.billable,
+        record.notes,
+        record.updated_at,
+    )
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class CsvWriter:
+    def __init__(self):
+        self._header = True
+
+    def write(self, records) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if self._header:
+            writer.writerow(FIELDS)
+            self._header = False
+        for record in records:
+            row = export_row(record)
+            writer.writerow(("" if value is None else value for value in row))
+        return buffer.getvalue().encode()
+
+    def close(self) -> bytes:
+        # An empty export still gets its header row
+        return self.write(()) if self._header else b""
+
+
+class JsonLinesWriter:
+    def write(self, records) -> bytes:
+        return "".join(
+            json.dumps(dict(zip(FIELDS, export_row(record))), ensure_ascii=False) + "\n" for record in records
+        ).encode()
+
+    def close(self) -> bytes:
+        return b""
+
+
+class _ChunkSink:
+    """Write-only file object that hands back what was written since the last drain.
+
+    ParquetWriter records byte offsets through ``tell``, so the position
+    keeps counting across drains.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetWriter:
+    """One Parquet row group per chunk."""
+
+    def __init__(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.string()),
+            ("date", pa.date32()),
+            ("user_id", pa.int64()),
+            ("user_name", pa.string()),
+            ("project_id", pa.int64()),
+            ("project_name", pa.string()),
+            ("task_id", pa.int64()),
+            ("task_name", pa.string()),
+            ("hours", pa.float64()),
+            ("minutes", pa.float64()),
+            ("billable", pa.bool_()),
+            ("notes", pa.string()),
+            ("updated_at", pa.string()),
+        ])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def write(self, records) -> bytes:
+        rows = [export_row(record) for record in records]
+        if not rows:
+            return b""
+        pa = self._pa
+        arrays = []
+        for index, field in enumerate(self._schema):
+            values = [row[index] for row in rows]
+            if field.name == "date":
+                arrays.append(pa.array(values, pa.string()).cast(pa.date32()))
+            else:
+                arrays.append(pa.array(values, field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def make_writer(fmt: str):
+    """Writer for an export format (a FORMATS key)."""
+    if fmt == "csv":
+        return CsvWriter()
+    if fmt == "jsonl":
+        return JsonLinesWriter()
+    if fmt == "parquet":
+        return ParquetWriter()
+    raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException
+
+from ..directory import directory
+from ..kantata import lookup_cache, query_cache
+from ..replica import replica
+
+router = APIRouter(prefix="/admin")
+
+@router.get("/cache")
+async def cache_stats():
+    """Report hit/miss counters for the name lookup and query result caches."""
+    return {"lookup": lookup_cache.stats(), "query": query_cache.stats()}
+
+@router.post("/cache/flush")
+async def flush_cache():
+    """Drop every cached lookup and query result so the next request goes upstream."""
+    return {"status": "success", "flushed": {"lookup": lookup_cache.clear(), "query": query_cache.clear()}}
+
+@router.get("/replica")
+async def replica_status():
+    """Report whether the SQLite replica is enabled and how fresh it is."""
+    return replica.status()
+
+@router.post("/replica/sync")
+async def replica_sync(full: bool = False):
+    """Run a delta (or full) replica sync immediately."""
+    if not replica.enabled:
+        raise HTTPException(400, "KANTATA_REPLICA_PATH not set")
+    await replica.sync(full=full)
+    return {"status": "success", **replica.status()}
+
+@router.get("/directory")
+async def directory_status():
+    """Report the size and freshness of the local name directory."""
+    return directory.status()
+
+@router.post("/directory/sync")
+async def directory_sync():
+    """Resync the local name directory immediately."""
+    await directory.sync()
+    lookup_cache.clear()
+    return {"status": "success", **directory.status()}
+
+@router.get("/directory/search")
+async def directory_search(kind: str, q: str, workspace_id: int | None = None, limit: int = 5):
+    """Return ranked local matches for a user, workspace or story name."""
+    if kind == "user":
+        index = directory.users
+    elif kind == "workspace":
+        index = directory.workspaces
+    elif kind == "story":
+        if workspace_id is None:
+            raise HTTPException(400, "workspace_id is required for story searches")
+        index = await directory.story_index(workspace_id)
+    else:
+        raise HTTPException(400, f"Unknown kind '{kind}'. Use user, workspace or story")
+    return {
+        "matches": [
+            {"id": int(record_id), "name": index.records[record_id][0], "score": score}
+            for score, record_id in index.search(q, limit)
+        ]
+    }
@@ -0,0 +1,119 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, ValidationError
+from typing import Any
+import asyncio
+
+from ..config import TOKEN, BATCH_MAX_ENTRIES, BATCH_CONCURRENCY
+from ..kantata import resolve_names, create_time_entry, normalize_name
+from .log_time_entry import TimeEntryPayload
+from .log_time_entry_by_name import TimeEntryByNamePayload
+
+router = APIRouter()
+
+class TimeEntryBatch(BaseModel):
+    # Each item is either an ID-based (/time_entry) or a name-based
+    # (/time_entry_by_name) payload; items are validated individually so one
+    # bad item (even one that is not an object) is reported instead of
+    # rejecting the whole batch.
+    entries: list[Any]
+
+def _parse_item(item: dict) -> TimeEntryPayload | TimeEntryByNamePayload:
+    if "user_id" in item or "project_id" in item:
+        return TimeEntryPayload.model_validate(item)
+    return TimeEntryByNamePayload.model_validate(item)
+
+def _error(index: int, status_code: int, detail) -> dict:
+    return {"index": index, "status": "error", "status_code": status_code, "detail": detail}
+
+class _Resolver:
+    """Resolve each distinct (user, project, task) in the batch once, concurrently.
+
+    Every tuple goes through kantata.resolve_names, so the batch gets the
+    same concurrency and RESOLVE_DEADLINE as /time_entry_by_name.
+    """
+
+    def __init__(self):
+        self._tasks: dict[tuple, asyncio.Task] = {}
+
+    def resolve(self, payload: TimeEntryByNamePayload) -> asyncio.Task:
+        key = tuple(normalize_name(name) if name else None
+                    for name in (payload.user_name, payload.project_name, payload.task_name))
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(
+                resolve_names(payload.user_name, payload.project_name, payload.task_name)
+            )
+        return task
+
+async def _create_by_name(payload: TimeEntryByNamePayload, resolver: _Resolver, semaphore) -> dict:
+    user, workspace, story = await resolver.resolve(payload)
+    story_id = story["story_id"] if story else None
+    async with semaphore:
+        entry_id = await create_time_entry({
+            "user_id": user["user_id"],
+            "workspace_id": workspace["workspace_id"],
+            "story_id": story_id,
+            "date_performed": payload.date,
+            "time_in_minutes": int(payload.hours * 60),
+            "billable": payload.billable,
+            "notes": payload.notes,
+        })
+    return {
+        "status": "success",
+        "entry_id": entry_id,
+        "minutes": int(payload.hours * 60),
+        "date": payload.date,
+        "user_id": user["user_id"],
+        "user_name": user["name"],
+        "project_name": workspace["name"],
+        "task_name": payload.task_name,
+    }
+
+async def _create_by_id(payload: TimeEntryPayload, semaphore) -> dict:
+    async with semaphore:
+        entry_id = await create_time_entry(payload.kantata_body()["time_entry"])
+    return {
+        "status": "success",
+        "entry_id": entry_id,
+        "minutes": int(payload.hours * 60),
+        "date": payload.date,
+        "user_id": payload.user_id,
+    }
+
+@router.post("/time_entries/batch")
+async def create_time_entries_batch(batch: TimeEntryBatch):
+    """Create many time entries in one call, reporting success or failure per item."""
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
+    if len(batch.entries) > BATCH_MAX_ENTRIES:
+        raise HTTPException(400, f"Batch too large: {len(batch.entries)} entries (max {BATCH_MAX_ENTRIES})")
+
+    resolver = _Resolver()
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index: int, item: Any) -> dict:
+        if not isinstance(item, dict):
+            return _error(index, 422, "Entry must be a JSON object")
+        try:
+            payload = _parse_item(item)
+            if isinstance(payload, TimeEntryPayload):
+                result = await _create_by_id(payload, semaphore)
+            else:
+                result = await _create_by_name(payload, resolver, semaphore)
+        except ValidationError as e:
+            return _error(index, 422, e.errors(include_url=False, include_context=False, include_input=False))
+        except HTTPException as e:
+            return _error(index, e.status_code, e.detail)
+        except Exception as e:
+            return _error(index, 500, f"Internal server error: {e}")
+        return {"index": index, **result}
+
+    results = await asyncio.gather(*(run(index, item) for index, item in enumerate(batch.entries)))
+    created = sum(1 for result in results if result["status"] == "success")
+    failed = len(results) - created
+    return {
+        "status": "success" if not failed else ("partial" if created else "error"),
+        "created": created,
+        "failed": failed,
+        "results": results,
+    }
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Literal, Optional
+import logging
+
+from .. import metrics
+from ..config import TOKEN
+from ..export import FORMATS, make_writer, parquet_available
+from ..kantata import iter_time_entry_pages
+from ..replica import replica
+from .query_time_entries import parse_time_period, resolve_query_filters
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+class TimeEntryExport(BaseModel):
+    time_period: str
+    user_name: Optional[str] = None
+    project_name: Optional[str] = None
+    task_name: Optional[str] = None
+    format: Literal["csv", "jsonl", "parquet"] = "csv"
+
+def in_range(records, start_date: str, end_date: str, user_id: int | None):
+    """Records performed within the range (and by ``user_id``, if given), as in the query table."""
+    for record in records:
+        if not start_date <= (record.date_performed or "") <= end_date:
+            continue
+        if user_id is not None and record.user_id != int(user_id):
+            continue
+        yield record
+
+@router.post("/time_entries/export")
+async def export_time_entries(payload: TimeEntryExport):
+    """Stream every matching time entry as CSV, JSON Lines or Parquet, one chunk per upstream page.
+
+    Rows carry resolved user, project and task names alongside their IDs.
+    The first page is fetched before the response starts, so upstream and
+    filter errors still produce an error status; a failure later on aborts
+    the download.
+    """
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
+    if payload.format == "parquet" and not parquet_available():
+        raise HTTPException(501, "Parquet export requires pyarrow")
+
+    start_date, end_date = parse_time_period(payload.time_period)
+    user_id, workspace_id, story_id = await resolve_query_filters(payload)
+
+    if replica.serves(start_date):
+        pages = replica.iter_time_entry_pages(start_date, end_date, user_id, workspace_id, story_id)
+    else:
+        pages = iter_time_entry_pages(start_date, end_date, user_id, workspace_id, story_id)
+    first_page = await anext(pages, None)
+    writer = make_writer(payload.format)
+
+    async def chunks():
+        exported = 0
+        try:
+            page = first_page
+            while page is not None:
+                entries, _ = page
+                records = list(in_range(entries.values(), start_date, end_date, user_id))
+                exported += len(records)
+                chunk = writer.write(records)
+                if chunk:
+                    yield chunk
+                page = await anext(pages, None)
+            tail = writer.close()
+            if tail:
+                yield tail
+        except Exception:
+            logger.exception("Time entry export failed after %d entries", exported)
+            raise
+        finally:
+            await pages.aclose()
+        metrics.entries_returned.observe(exported, "/time_entries/export")
+
+    media_type, extension = FORMATS[payload.format]
+    filename = f"time_entries_{start_date}_{end_date}.{extension}"
+    return StreamingResponse(
+        chunks(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field, field_validator
-from datetime import datetime, date, timedelta
 
-from ..config import TOKEN, HEADERS, BASE_URL
-import httpx
+from ..config import TOKEN
+from ..dates import resolve_date
+from ..kantata import create_time_entry as post_time_entry
 
 router = APIRouter()
 
@@ -19,23 +19,7 @@ class TimeEntryPayload(BaseModel):
     @field_validator("date")
     @classmethod
     def iso_date(cls, v):
-        from dateutil import parser
-        v_lower = v.lower().strip()
-        if v_lower in ["today", "now"]:
-            return date.today().isoformat()
-        if v_lower == "yesterday":
-            return (date.today() - timedelta(days=1)).isoformat()
-        if v_lower == "tomorrow":
-            return (date.today() + timedelta(days=1)).isoformat()
-        try:
-            dt = datetime.fromisoformat(v)
-            return dt.date().isoformat()
-        except ValueError:
-            try:
-                dt = parser.parse(v, fuzzy=True)
-                return dt.date().isoformat()
-            except Exception:
-                return date.today().isoformat()
+        return resolve_date(v).isoformat()
 
     def kantata_body(self) -> dict:
         return {
@@ -54,12 +38,7 @@ class TimeEntryPayload(BaseModel):
 async def create_time_entry(payload: TimeEntryPayload):
     if not TOKEN:
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
-    async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=10) as client:
-        r = await client.post("/time_entries.json", json=payload.kantata_body())
-        if r.status_code not in (200, 201):
-            raise HTTPException(r.status_code, r.text)
-    data = r.json()
-    entry_id = data.get("results", ["?"])[0]
+    entry_id = await post_time_entry(payload.kantata_body()["time_entry"])
     return {
         "status": "success",
         "entry_id": entry_id,
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+import secrets
+
+from ..cache import TTLCache
+from ..config import TOKEN, DRAFT_TTL, DRAFT_CACHE_SIZE
+from ..kantata import resolve_names, create_time_entry
+from .log_time_entry_by_name import TimeEntryByNamePayload
+
+router = APIRouter()
+
+# draft token -> {"time_entry": Kantata body, "response": fields echoed on commit}
+drafts = TTLCache(DRAFT_CACHE_SIZE, DRAFT_TTL)
+
+class DraftCommit(BaseModel):
+    draft_token: str
+
+@router.post("/time_entry/prepare")
+async def prepare_time_entry(payload: TimeEntryByNamePayload):
+    """Resolve names and date in one pass and hold the result as a short-lived draft."""
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
+
+    user, workspace, story = await resolve_names(payload.user_name, payload.project_name, payload.task_name)
+    minutes = int(payload.hours * 60)
+    token = secrets.token_urlsafe(16)
+    drafts.set(token, {
+        "time_entry": {
+            "user_id": user["user_id"],
+            "workspace_id": workspace["workspace_id"],
+            "story_id": story["story_id"] if story else None,
+            "date_performed": payload.date,
+            "time_in_minutes": minutes,
+            "billable": payload.billable,
+            "notes": payload.notes,
+        },
+        "response": {
+            "minutes": minutes,
+            "date": payload.date,
+            "user_id": user["user_id"],
+            "user_name": user["name"],
+            "project_name": workspace["name"],
+            "task_name": payload.task_name,
+        },
+    })
+    return {
+        "status": "success",
+        "draft_token": token,
+        "expires_in": DRAFT_TTL,
+        "user": user,
+        "project": workspace,
+        "task": story,
+        "hours": payload.hours,
+        "billable": payload.billable,
+        "date": payload.date,
+        "notes": payload.notes,
+    }
+
+@router.post("/time_entry/commit")
+async def commit_time_entry(commit: DraftCommit):
+    """Post a prepared draft to Kantata without resolving anything again."""
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
+
+    # Pop first so a double-submitted confirmation cannot post twice
+    draft = drafts.pop(commit.draft_token)
+    if draft is None:
+        raise HTTPException(410, "Draft expired or already committed")
+    try:
+        entry_id = await create_time_entry(draft["time_entry"])
+    except HTTPException:
+        # Keep the draft so the user can retry the confirmation
+        drafts.set(commit.draft_token, draft)
+        raise
+    return {"status": "success", "entry_id": entry_id, **draft["response"]}
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics
+from ..kantata import lookup_cache, query_cache
+from ..ratelimit import limiter
+
+router = APIRouter()
+
+_caches = {"lookup": lookup_cache, "query": query_cache}
+
+def _cache_stat(stat: str):
+    return lambda: {(name,): cache.stats()[stat] for name, cache in _caches.items()}
+
+metrics.CallbackGauge("kantata_cache_hits", "Cache hits since start", ("cache",), _cache_stat("hits"))
+metrics.CallbackGauge("kantata_cache_misses", "Cache misses since start", ("cache",), _cache_stat("misses"))
+metrics.CallbackGauge("kantata_cache_hit_ratio", "Cache hit ratio since start", ("cache",), _cache_stat("hit_ratio"))
+metrics.CallbackGauge("kantata_cache_size", "Entries currently cached", ("cache",), _cache_stat("size"))
+metrics.CallbackGauge("kantata_rate_limit_concurrency", "Adaptive upstream concurrency window", (), lambda: {(): limiter.stats()["limit"]})
+metrics.CallbackGauge("kantata_rate_limit_throttled", "Throttled (429/503) upstream responses since start", (), lambda: {(): limiter.throttled})
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Expose handler, upstream and cache metrics in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,200 +1,269 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from datetime import datetime, date, timedelta
-from typing import Optional
-import asyncio
+from datetime import date
+from typing import Literal, Optional
+import json
+import logging
 
-from ..config import TOKEN
+from .. import metrics
+from ..cache import MISSING
+from ..columnar import EntryColumns, week_start
+from ..config import TOKEN, QUERY_MAX_OUTPUT_CHARS
+from ..dates import DateParseError, resolve_period
+from ..replica import replica
 from ..kantata import (
-    fetch_time_entries, get_user_name, get_workspace_name, get_story_name,
-    lookup_user, lookup_workspace, lookup_story
+    iter_time_entry_pages, iter_dated_time_entry_pages, resolve_names, query_cache
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 class TimeEntryQuery(BaseModel):
     time_period: str
     user_name: Optional[str] = None
     project_name: Optional[str] = None
     task_name: Optional[str] = None
+    # "rows" lists every entry by week; "summary" and "top" return only
+    # per-group totals (all groups, or the ``limit`` largest by hours)
+    mode: Literal["rows", "summary", "top"] = "rows"
+    group_by: Literal["week", "user", "project", "task", "billable"] = "week"
+    limit: int = Field(10, ge=1, le=100)
+
+    def view(self) -> tuple:
+        """The part of the query that shapes the output, for cache keys."""
+        if self.mode == "rows":
+            return ("rows",)
+        return (self.mode, self.group_by, self.limit if self.mode == "top" else None)
 
 def parse_time_period(time_period: str) -> tuple[str, str]:
     """Parse natural language time period into start and end dates."""
-    period_lower = time_period.lower().strip()
-    today = date.today()
-    
-    # Month name mapping
-    month_names = {
-        'january': 1, 'jan': 1,
-        'february': 2, 'feb': 2,
-        'march': 3, 'mar': 3,
-        'april': 4, 'apr': 4,
-        'may': 5,
-        'june': 6, 'jun': 6,
-        'july': 7, 'jul': 7,
-        'august': 8, 'aug': 8,
-        'september': 9, 'sep': 9, 'sept': 9,
-        'october': 10, 'oct': 10,
-        'november': 11, 'nov': 11,
-        'december': 12, 'dec': 12
-    }
-    
-    if period_lower == "today":
-        return today.isoformat(), today.isoformat()
-    elif period_lower == "yesterday":
-        yesterday = today - timedelta(days=1)
-        return yesterday.isoformat(), yesterday.isoformat()
-    elif period_lower == "this week":
-        # Monday to Sunday
-        days_since_monday = today.weekday()
-        monday = today - timedelta(days=days_since_monday)
-        sunday = monday + timedelta(days=6)
-        return monday.isoformat(), sunday.isoformat()
-    elif period_lower == "last week":
-        # Previous Monday to Sunday
-        days_since_monday = today.weekday()
-        last_monday = today - timedelta(days=days_since_monday + 7)
-        last_sunday = last_monday + timedelta(days=6)
-        return last_monday.isoformat(), last_sunday.isoformat()
-    elif period_lower == "this month":
-        # First day to last day of current month
-        first_day = today.replace(day=1)
-        if today.month == 12:
-            last_day = today.replace(year=today.year + 1, month=1, day=1) - timedelta(days=1)
-        else:
-            last_day = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
-        return first_day.isoformat(), last_day.isoformat()
-    elif period_lower == "last month":
-        # First day to last day of previous month
-        if today.month == 1:
-            first_day = today.replace(year=today.year - 1, month=12, day=1)
-        else:
-            first_day = today.replace(month=today.month - 1, day=1)
-        last_day = today.replace(day=1) - timedelta(days=1)
-        return first_day.isoformat(), last_day.isoformat()
-    elif period_lower == "this year":
-        # January 1 to December 31 of current year
-        first_day = today.replace(month=1, day=1)
-        last_day = today.replace(month=12, day=31)
-        return first_day.isoformat(), last_day.isoformat()
-    elif " to " in period_lower:
-        # Custom date range
-        try:
-            start_str, end_str = period_lower.split(" to ")
-            start_date = datetime.strptime(start_str.strip(), "%Y-%m-%d").date()
-            end_date = datetime.strptime(end_str.strip(), "%Y-%m-%d").date()
-            return start_date.isoformat(), end_date.isoformat()
-        except ValueError:
-            raise HTTPException(400, f"Invalid date range format: {time_period}. Use YYYY-MM-DD to YYYY-MM-DD")
-    
-    # Handle month names like "june 2025", "january 2024", etc.
-    words = period_lower.split()
-    if len(words) == 2:
-        month_word, year_word = words
-        if month_word in month_names and year_word.isdigit():
-            month_num = month_names[month_word]
-            year_num = int(year_word)
-            if 1900 <= year_num <= 2100:  # Reasonable year range
-                first_day = date(year_num, month_num, 1)
-                if month_num == 12:
-                    last_day = date(year_num + 1, 1, 1) - timedelta(days=1)
-                else:
-                    last_day = date(year_num, month_num + 1, 1) - timedelta(days=1)
-                return first_day.isoformat(), last_day.isoformat()
-    
-    # Try to parse as a single date
     try:
-        parsed_date = datetime.strptime(period_lower, "%Y-%m-%d").date()
-        return parsed_date.isoformat(), parsed_date.isoformat()
-    except ValueError:
-        raise HTTPException(400, f"Unrecognized time period: {time_period}. Supported formats: 'today', 'this week', 'this month', 'june 2025', '2025-06-01 to 2025-06-30', etc.")
-
-def format_time_entries_table(entries: list, start_date: str, end_date: str) -> str:
-    """Format time entries into a beautiful table grouped by week."""
-    if not entries:
+        start_date, end_date = resolve_period(time_period)
+    except DateParseError as e:
+        raise HTTPException(400, str(e))
+    return start_date.isoformat(), end_date.isoformat()
+
+TABLE_HEADER = "┌─────────────┬────────────┬─────────────────┬─────────────────┬───────┬──────────┬─────────────────────┐"
+HEADER_ROW = "│ User        │ Date       │ Project         │ Task            │ Hours │ Billable │ Notes               │"
+SEPARATOR = "├─────────────┼────────────┼─────────────────┼─────────────────┼───────┼──────────┼─────────────────────┤"
+TABLE_FOOTER = "└─────────────┴────────────┴─────────────────┴─────────────────┴───────┴──────────┴─────────────────────┘"
+
+# Frame lines shared by every week block, joined once
+WEEK_FRAME = f"{TABLE_HEADER}\n{HEADER_ROW}\n{SEPARATOR}\n"
+WEEK_END = f"{TABLE_FOOTER}\n"
+BILLABLE_CELLS = ("No      ", "Yes     ")
+
+class RowCells:
+    """Padded table cells cached per user, project, task, day and duration.
+
+    Reports repeat the same few names and durations across thousands of
+    rows, so each distinct cell is truncated/padded once per render.
+    """
+
+    def __init__(self, columns: EntryColumns):
+        self.columns = columns
+        self.users: dict[int, str] = {}
+        self.projects: dict[int, str] = {}
+        self.tasks: dict[int, str] = {}
+        self.days: dict[int, str] = {}
+        self.hours: dict[float, str] = {}
+
+    def write_rows(self, write, rows) -> None:
+        columns = self.columns
+        users, projects, tasks, days, hours = self.users, self.projects, self.tasks, self.days, self.hours
+        user_ids, workspace_ids, story_ids = columns.user_ids, columns.workspace_ids, columns.story_ids
+        ordinals, minutes, billable, notes = columns.ordinals, columns.minutes, columns.billable, columns.notes
+        for row in rows:
+            key = user_ids[row]
+            user = users.get(key)
+            if user is None:
+                user = users[key] = f"{columns.user_name(row):<11.11}"
+            key = workspace_ids[row]
+            project = projects.get(key)
+            if project is None:
+                project = projects[key] = f"{columns.project_name(row):<15.15}"
+            key = story_ids[row]
+            task = tasks.get(key)
+            if task is None:
+                task = tasks[key] = f"{columns.task_name(row):<15.15}"
+            key = ordinals[row]
+            day = days.get(key)
+            if day is None:
+                day = days[key] = date.fromordinal(key).isoformat()
+            key = minutes[row]
+            duration = hours.get(key)
+            if duration is None:
+                duration = hours[key] = f"{key / 60.0:5.1f}"
+            write(
+                f"│ {user} │ {day} │ {project} │ {task} │ {duration} │ "
+                f"{BILLABLE_CELLS[billable[row] != 0]} │ {notes[row]:<18.18} │\n"
+            )
+
+def write_week(write, cells: RowCells, monday: int, rows) -> None:
+    """Write one week's title, table frame and rows through ``write``."""
+    write(f"=== Week of {date.fromordinal(monday).strftime('%B %d, %Y')} ===\n")
+    write(WEEK_FRAME)
+    cells.write_rows(write, rows)
+    write(WEEK_END)
+
+def format_week_block(columns: EntryColumns, monday: int, rows: list[int], cells: RowCells | None = None) -> str:
+    """Render one week's table from the given (date-ordered) column rows."""
+    parts: list[str] = []
+    write_week(parts.append, cells or RowCells(columns), monday, rows)
+    return "".join(parts)
+
+def format_summary(total_entries: int, total_hours: float, total_billable_hours: float) -> list:
+    return [
+        "📊 SUMMARY",
+        f"Total Entries: {total_entries}",
+        f"Total Hours: {total_hours:.1f}",
+        f"Billable Hours: {total_billable_hours:.1f}",
+    ]
+
+def format_time_entries_table(columns: EntryColumns, start_date: str, end_date: str) -> str:
+    """Format time entries into a beautiful table grouped by week.
+
+    Rows are sorted by date ordinal once; a week block starts whenever the
+    week-start ordinal changes, and every line is appended to one buffer
+    that is joined once at the end.
+    """
+    if not len(columns):
         return f"No time entries found for {start_date} to {end_date}"
     
-    # Group entries by week
-    weeks = {}
-    for entry_id, entry_data in entries.items():
-        entry_date = entry_data.get("date_performed", "")
-        if entry_date:
-            try:
-                date_obj = datetime.strptime(entry_date, "%Y-%m-%d").date()
-                # Get the Monday of the week
-                days_since_monday = date_obj.weekday()
-                monday = date_obj - timedelta(days=days_since_monday)
-                week_key = monday.isoformat()
-                
-                if week_key not in weeks:
-                    weeks[week_key] = []
-                weeks[week_key].append((entry_id, entry_data))
-            except ValueError:
-                continue
-    
-    # Sort weeks
-    sorted_weeks = sorted(weeks.keys())
-    
-    output = []
-    total_entries = 0
-    total_hours = 0
-    total_billable_hours = 0
-    
-    for week_start in sorted_weeks:
-        week_entries = weeks[week_start]
-        week_entries.sort(key=lambda x: x[1].get("date_performed", ""))
-        
-        # Format week header
-        monday_date = datetime.strptime(week_start, "%Y-%m-%d").date()
-        sunday_date = monday_date + timedelta(days=6)
-        week_header = f"=== Week of {monday_date.strftime('%B %d, %Y')} ==="
-        output.append(week_header)
-        
-        # Create table header
-        table_header = "┌─────────────┬────────────┬─────────────────┬─────────────────┬───────┬──────────┬─────────────────────┐"
-        header_row = "│ User        │ Date       │ Project         │ Task            │ Hours │ Billable │ Notes               │"
-        separator = "├─────────────┼────────────┼─────────────────┼─────────────────┼───────┼──────────┼─────────────────────┤"
-        table_footer = "└─────────────┴────────────┴─────────────────┴─────────────────┴───────┴──────────┴─────────────────────┘"
-        
-        output.append(table_header)
-        output.append(header_row)
-        output.append(separator)
-        
-        # Add entries for this week
-        for entry_id, entry_data in week_entries:
-            user_name = entry_data.get("user_name", "Unknown")
-            date_performed = entry_data.get("date_performed", "")
-            project_name = entry_data.get("project_name", "Unknown")
-            task_name = entry_data.get("task_name", "")
-            hours = entry_data.get("hours", 0)
-            billable = "Yes" if entry_data.get("billable", False) else "No"
-            notes = entry_data.get("notes", "") or ""  # Handle None values
-            notes = notes[:18]  # Truncate long notes
-            
-            # Truncate long names
-            user_name = user_name[:11] if len(user_name) > 11 else user_name.ljust(11)
-            project_name = project_name[:15] if len(project_name) > 15 else project_name.ljust(15)
-            task_name = task_name[:15] if len(task_name) > 15 else task_name.ljust(15)
-            notes = notes[:18] if len(notes) > 18 else notes.ljust(18)
-            
-            row = f"│ {user_name} │ {date_performed} │ {project_name} │ {task_name} │ {hours:5.1f} │ {billable:8} │ {notes} │"
-            output.append(row)
-            
-            total_entries += 1
-            total_hours += hours
-            if entry_data.get("billable", False):
-                total_billable_hours += hours
-        
-        output.append(table_footer)
-        output.append("")  # Empty line between weeks
+    parts: list[str] = []
+    write = parts.append
+    cells = RowCells(columns)
+    ordinals = columns.ordinals
+    order = sorted(range(len(columns)), key=ordinals.__getitem__)
+
+    first = 0
+    monday = week_start(ordinals[order[0]])
+    for position, row in enumerate(order):
+        ordinal = ordinals[row]
+        if ordinal >= monday + 7:
+            write_week(write, cells, monday, order[first:position])
+            write("\n")  # Empty line between weeks
+            first = position
+            monday = week_start(ordinal)
+    write_week(write, cells, monday, order[first:])
+    write("\n")
     
     # Add summary
-    output.append("📊 SUMMARY")
-    output.append(f"Total Entries: {total_entries}")
-    output.append(f"Total Hours: {total_hours:.1f}")
-    output.append(f"Billable Hours: {total_billable_hours:.1f}")
+    write("\n".join(format_summary(*columns.totals())))
     
-    return "\n".join(output)
+    return "".join(parts)
+
+def format_groups(columns: EntryColumns, by: str, limit: int | None = None) -> str:
+    """Per-group totals, either every group or the ``limit`` largest by hours.
+
+    Weeks and the billable split are listed in key order, everything else
+    by hours (largest first).
+    """
+    groups = columns.group_by(by)
+    ordered = list(groups.items())
+    if limit is not None or by not in ("week", "billable"):
+        ordered.sort(key=lambda item: -item[1].hours)
+    heading = f"📊 HOURS BY {by.upper()}"
+    if limit is not None and len(ordered) > limit:
+        heading += f" (top {limit} of {len(ordered)})"
+    shown, rest = (ordered[:limit], ordered[limit:]) if limit is not None else (ordered, [])
+
+    lines = [heading]
+    for key, totals in shown:
+        label = columns.label(by, key)
+        if by == "week":
+            label = f"Week of {label}"
+        lines.append(f"{label}: {totals.entries} entries, {totals.hours:.1f} h ({totals.billable_hours:.1f} billable)")
+    if rest:
+        lines.append(
+            f"… {len(rest)} more: {sum(totals.entries for _, totals in rest)} entries, "
+            f"{sum(totals.hours for _, totals in rest):.1f} h"
+        )
+    lines.append("")
+    lines.extend(format_summary(*columns.totals()))
+    return "\n".join(lines)
+
+def truncation_marker(max_chars: int) -> str:
+    return (
+        f"⚠️ Output truncated at {max_chars} characters. "
+        "Use mode 'summary' or 'top', or a narrower period, to see everything."
+    )
+
+def close_week(head: str) -> str:
+    """End a cut-off rows table cleanly.
+
+    A trailing week block that has no rows yet is dropped.  A block that
+    already has rows but no closing border gets WEEK_END.
+    """
+    start = head.rfind("=== Week of ")
+    if start < 0:
+        return head
+    block = head[start:]
+    if TABLE_FOOTER in block:
+        return head
+    if len(block) <= block.find("\n") + 1 + len(WEEK_FRAME):
+        return head[:start]
+    return head + WEEK_END
+
+def cut_week_block(block: str, max_chars: int) -> str:
+    """Cut one rendered week block to at most ``max_chars`` at a row boundary.
+
+    The cut table is closed as in close_week; a block with no room for
+    any row comes back empty.
+    """
+    if len(block) <= max_chars:
+        return block
+    cut = block.rfind("\n", 0, max(0, max_chars - len(WEEK_END)))
+    return close_week(block[:cut + 1]) if cut >= 0 else ""
+
+def cap_output(text: str, max_chars: int, footer: str = "", tables: bool = False) -> tuple[str, bool]:
+    """Cut ``text`` at a line boundary to at most ``max_chars`` characters.
+
+    When it is cut, a truncation marker and then ``footer`` (which must be
+    the tail of ``text``, e.g. the summary) are appended within the limit.
+    With ``tables`` the cut is made to leave complete week tables (see
+    close_week).  Returns ``(text, truncated)``.
+    """
+    if len(text) <= max_chars:
+        return text, False
+    marker = truncation_marker(max_chars)
+    tail = f"{marker}\n\n{footer}" if footer else marker
+    reserve = len(tail) + 1 + (len(WEEK_END) if tables else 0)
+    cut = text.rfind("\n", 0, max(0, max_chars - reserve))
+    head = text[:cut + 1] if cut >= 0 else ""
+    if tables:
+        head = close_week(head)
+    return head + tail, True
+
+def format_result(columns: EntryColumns, payload: TimeEntryQuery, start_date: str, end_date: str) -> tuple[str, bool]:
+    """``formatted_output`` for the requested mode, capped at QUERY_MAX_OUTPUT_CHARS."""
+    if not len(columns):
+        return f"No time entries found for {start_date} to {end_date}", False
+    summary = "\n".join(format_summary(*columns.totals()))
+    if payload.mode == "rows":
+        text = format_time_entries_table(columns, start_date, end_date)
+        return cap_output(text, QUERY_MAX_OUTPUT_CHARS, summary, tables=True)
+    limit = payload.limit if payload.mode == "top" else None
+    return cap_output(format_groups(columns, payload.group_by, limit), QUERY_MAX_OUTPUT_CHARS, summary)
+
+async def resolve_query_filters(payload: TimeEntryQuery) -> tuple[int | None, int | None, int | None]:
+    """Resolve the optional user/project/task names to Kantata IDs.
+
+    User and project lookups run concurrently; lookups that fail drop the
+    corresponding filter instead of failing the query.
+    """
+    user, workspace, story = await resolve_names(
+        payload.user_name, payload.project_name, payload.task_name, strict=False
+    )
+    user_id = user["user_id"] if user else None
+    workspace_id = workspace["workspace_id"] if workspace else None
+    story_id = story["story_id"] if story else None
+    logger.debug(
+        "Resolved query filters",
+        extra={"fields": {"user_id": user_id, "workspace_id": workspace_id, "story_id": story_id}},
+    )
+    return user_id, workspace_id, story_id
 
 @router.post("/query_time_entries")
 async def query_time_entries(payload: TimeEntryQuery):
@@ -203,173 +272,203 @@ async def query_time_entries(payload: TimeEntryQuery):
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
     
     try:
-        print(f"DEBUG: Starting query for {payload.time_period}")
-        
         # Parse time period
         start_date, end_date = parse_time_period(payload.time_period)
-        print(f"DEBUG: Date range: {start_date} to {end_date}")
-        
-        # Resolve user name to ID if provided (but don't use as API filter)
-        user_id = None
-        if payload.user_name:
-            try:
-                print(f"DEBUG: Looking up user: {payload.user_name}")
-                user_info = await lookup_user(payload.user_name)
-                user_id = user_info["user_id"]
-                print(f"DEBUG: Found user ID: {user_id}")
-            except HTTPException as e:
-                print(f"DEBUG: User lookup failed: {e}")
-                # If user lookup fails, continue without user filter
-                pass
-        
-        # Resolve project name to ID if provided
-        workspace_id = None
-        if payload.project_name:
-            try:
-                print(f"DEBUG: Looking up workspace: {payload.project_name}")
-                workspace_info = await lookup_workspace(payload.project_name)
-                workspace_id = workspace_info["workspace_id"]
-                print(f"DEBUG: Found workspace ID: {workspace_id}")
-            except HTTPException as e:
-                print(f"DEBUG: Workspace lookup failed: {e}")
-                # If workspace lookup fails, continue without workspace filter
-                pass
+        logger.debug("Query %r resolved to %s..%s", payload.time_period, start_date, end_date)
         
-        # Resolve task name to ID if provided
-        story_id = None
-        if payload.task_name and workspace_id:
-            try:
-                print(f"DEBUG: Looking up story: {payload.task_name}")
-                story_info = await lookup_story(workspace_id, payload.task_name)
-                story_id = story_info["story_id"]
-                print(f"DEBUG: Found story ID: {story_id}")
-            except HTTPException as e:
-                print(f"DEBUG: Story lookup failed: {e}")
-                # If story lookup fails, continue without story filter
-                pass
+        user_id, workspace_id, story_id = await resolve_query_filters(payload)
         
-        # Fetch time entries using API filters to minimise result size
-        print(f"DEBUG: Fetching time entries...")
-        entries, included_data = await fetch_time_entries(start_date, end_date, user_id, workspace_id, story_id)
-        print(f"DEBUG: Found {len(entries)} entries")
-        print(f"DEBUG: Included data keys: {list(included_data.keys())}")
-        print(f"DEBUG: Users in included data: {list(included_data.get('users', {}).keys())}")
-        print(f"DEBUG: Workspaces in included data: {list(included_data.get('workspaces', {}).keys())}")
-        print(f"DEBUG: Stories in included data: {list(included_data.get('stories', {}).keys())}")
+        cache_key = (start_date, end_date, user_id, workspace_id, story_id, payload.view())
+        cached = query_cache.get(cache_key)
+        if cached is not MISSING:
+            logger.debug("Serving %s from query cache", cache_key)
+            return {**cached, "time_period": payload.time_period}
         
-        if not entries:
-            return {
-                "status": "success",
-                "time_period": payload.time_period,
-                "start_date": start_date,
-                "end_date": end_date,
-                "formatted_output": f"No time entries found for {start_date} to {end_date}",
-                "total_entries": 0
-            }
-        
-        # Debug: Show structure of first entry
-        if entries:
-            first_entry_id = list(entries.keys())[0]
-            first_entry = entries[first_entry_id]
-            print(f"DEBUG: Sample entry structure: {first_entry}")
-            print(f"DEBUG: Sample entry keys: {list(first_entry.keys())}")
-            # Check if included data is at the top level or nested
-            if "users" in first_entry:
-                print(f"DEBUG: Found users in entry: {list(first_entry['users'].keys())}")
-            if "workspaces" in first_entry:
-                print(f"DEBUG: Found workspaces in entry: {list(first_entry['workspaces'].keys())}")
-            if "stories" in first_entry:
-                print(f"DEBUG: Found stories in entry: {list(first_entry['stories'].keys())}")
-        
-        # Filter by date_performed and user if specified
-        filtered_entries = {}
-        for entry_id, entry_data in entries.items():
-            entry_user_id = entry_data.get("user_id")
-            entry_date_performed = entry_data.get("date_performed")
-            print(f"DEBUG: Entry {entry_id} has user_id: {entry_user_id}, date_performed: {entry_date_performed}")
-            
-            # Check if entry is within the requested date range
-            if entry_date_performed and start_date <= entry_date_performed <= end_date:
-                # If user filter is specified, only include entries for that user
-                if user_id is not None:
-                    # Convert both to strings for comparison (API returns string, lookup returns int)
-                    if str(entry_user_id) == str(user_id):
-                        filtered_entries[entry_id] = entry_data
-                else:
-                    # No user filter, include all entries
-                    filtered_entries[entry_id] = entry_data
-        
-        print(f"DEBUG: After date and user filtering: {len(filtered_entries)} entries")
-        
-        # Process entries using included data from the API response
-        resolved_entries = {}
-        for entry_id, entry_data in filtered_entries.items():
-            try:
-                print(f"DEBUG: Processing entry {entry_id}")
-                
-                # Convert minutes to hours
-                minutes = entry_data.get("time_in_minutes", 0)
-                hours = minutes / 60.0
-                
-                # Get names from included data instead of making API calls
-                user_name = "Unknown User"
-                workspace_name = "Unknown Project"
-                task_name = ""
-                
-                # Extract user name from included user data
-                user_id_for_lookup = entry_data.get("user_id")
-                if user_id_for_lookup and str(user_id_for_lookup) in included_data.get("users", {}):
-                    user_data = included_data["users"][str(user_id_for_lookup)]
-                    if user_data.get("first_name") and user_data.get("last_name"):
-                        user_name = f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip()
-                    elif user_data.get("name"):
-                        user_name = user_data["name"]
-                    elif user_data.get("full_name"):
-                        user_name = user_data["full_name"]
-                    elif user_data.get("display_name"):
-                        user_name = user_data["display_name"]
-                
-                # Extract workspace name from included workspace data
-                workspace_id_for_lookup = entry_data.get("workspace_id")
-                if workspace_id_for_lookup and str(workspace_id_for_lookup) in included_data.get("workspaces", {}):
-                    workspace_data = included_data["workspaces"][str(workspace_id_for_lookup)]
-                    workspace_name = workspace_data.get("title", f"Workspace {workspace_id_for_lookup}")
-                
-                # Extract story name from included story data
-                story_id_for_lookup = entry_data.get("story_id")
-                if story_id_for_lookup and str(story_id_for_lookup) in included_data.get("stories", {}):
-                    story_data = included_data["stories"][str(story_id_for_lookup)]
-                    task_name = story_data.get("title", "")
-                
-                # Create resolved entry with actual names
-                resolved_entries[entry_id] = {
-                    "user_name": user_name,
-                    "date_performed": entry_data.get("date_performed", ""),
-                    "project_name": workspace_name,
-                    "task_name": task_name,
-                    "hours": hours,
-                    "billable": entry_data.get("billable", False),
-                    "notes": entry_data.get("notes", "") or ""
-                }
-                print(f"DEBUG: Created resolved entry: {resolved_entries[entry_id]}")
-            except Exception as e:
-                print(f"Warning: Failed to process entry {entry_id}: {e}")
-                continue
-        
-        print(f"DEBUG: Processed {len(resolved_entries)} entries")
+        # Fetch time entries using API filters to minimise result size, and
+        # fold each upstream page into the columns as it arrives
+        generation = query_cache.generation
+        columns = EntryColumns()
+        if replica.serves(start_date):
+            pages = replica.iter_time_entry_pages(start_date, end_date, user_id, workspace_id, story_id)
+        else:
+            pages = iter_time_entry_pages(start_date, end_date, user_id, workspace_id, story_id)
+        async for entries, _ in pages:
+            columns.extend(entries, start_date, end_date, user_id)
+        logger.debug("Fetched %d entries", len(columns))
         
         # Format the results
-        formatted_output = format_time_entries_table(resolved_entries, start_date, end_date)
+        formatted_output, truncated = format_result(columns, payload, start_date, end_date)
         
-        return {
+        result = {
             "status": "success",
             "time_period": payload.time_period,
             "start_date": start_date,
             "end_date": end_date,
+            "mode": payload.mode,
             "formatted_output": formatted_output,
-            "total_entries": len(resolved_entries)
+            "total_entries": len(columns),
+            "truncated": truncated,
         }
+        query_cache.set(cache_key, result, generation=generation)
+        metrics.entries_returned.observe(len(columns), "/query_time_entries")
+        return result
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in query_time_entries: {e}")
-        raise HTTPException(500, f"Internal server error: {str(e)}") 
\ No newline at end of file
+        logger.exception("Error in query_time_entries")
+        raise HTTPException(500, f"Internal server error: {str(e)}")
+
+async def iter_week_columns(pages, start_date: str, end_date: str, user_id: int | None):
+    """Regroup ``(done_before, entries, included_data)`` pages into weeks.
+
+    Yields ``(monday, columns)`` for each week with entries, in date order,
+    as soon as a page's ``done_before`` shows the week is complete; only
+    the records of incomplete weeks are held between pages.
+    """
+    pending: dict[int, dict] = {}
+    ordinal_for: dict[str, int] = {}
+
+    def complete(before: int):
+        for monday in sorted(m for m in pending if m + 7 <= before):
+            week = EntryColumns.from_entries(pending.pop(monday), start_date, end_date, user_id)
+            if len(week):
+                yield monday, week
+
+    async for done_before, entries, _ in pages:
+        for entry_id, record in entries.items():
+            performed = record.date_performed
+            ordinal = ordinal_for.get(performed)
+            if ordinal is None:
+                try:
+                    ordinal = date.fromisoformat(performed).toordinal()
+                except ValueError:
+                    continue  # EntryColumns would drop it too
+                ordinal_for[performed] = ordinal
+            pending.setdefault(week_start(ordinal), {})[entry_id] = record
+        for item in complete(date.fromisoformat(done_before).toordinal()):
+            yield item
+    for item in complete(date.max.toordinal() + 7):
+        yield item
+
+@router.post("/query_time_entries/stream")
+async def stream_time_entries(payload: TimeEntryQuery):
+    """Stream a query as NDJSON, emitting each week block as soon as its pages arrive.
+
+    Events are ``start``, one ``week`` per week with entries (including
+    running totals), then ``summary``.  A failure after streaming has begun
+    is reported as an ``error`` event.  Once the week blocks reach
+    QUERY_MAX_OUTPUT_CHARS, the block that crosses it is cut at a row
+    boundary and sent with ``truncated`` set, later weeks are only counted,
+    and the summary reports ``truncated``; summary and top modes send only
+    the ``summary`` event.
+    Completed streams are cached in query_cache like /query_time_entries
+    results and replayed on a hit.
+    """
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
+
+    start_date, end_date = parse_time_period(payload.time_period)
+    user_id, workspace_id, story_id = await resolve_query_filters(payload)
+    # Same key shape as /query_time_entries; the view is tagged "stream"
+    # because the cached value is the event lines rather than a result dict
+    cache_key = (start_date, end_date, user_id, workspace_id, story_id, ("stream", *payload.view()))
+    cached = query_cache.get(cache_key)
+
+    async def events():
+        yield json.dumps({
+            "type": "start",
+            "time_period": payload.time_period,
+            "start_date": start_date,
+            "end_date": end_date,
+        }) + "\n"
+        if cached is not MISSING:
+            logger.debug("Serving %s from query cache", cache_key)
+            for line in cached:
+                yield line
+            return
+
+        generation = query_cache.generation
+        replay: list[str] = []
+        total_entries = 0
+        total_hours = 0
+        total_billable_hours = 0
+        if replica.serves(start_date):
+            pages = replica.iter_dated_time_entry_pages(start_date, end_date, user_id, workspace_id, story_id)
+        else:
+            # Rows mode fetches incrementally, so each week is sent as soon
+            # as its pages are in instead of when its month or range is
+            pages = iter_dated_time_entry_pages(
+                start_date, end_date, user_id, workspace_id, story_id, incremental=payload.mode == "rows"
+            )
+        # Summary and top modes only need the totals, so they fold every
+        # page into one set of columns and emit no week events
+        aggregate = EntryColumns() if payload.mode != "rows" else None
+        emitted = 0
+        truncated = False
+        try:
+            if aggregate is not None:
+                async for _, entries, _ in pages:
+                    aggregate.extend(entries, start_date, end_date, user_id)
+            else:
+                async for monday, columns in iter_week_columns(pages, start_date, end_date, user_id):
+                    week = columns.totals()
+                    total_entries += week.entries
+                    total_hours += week.hours
+                    total_billable_hours += week.billable_hours
+                    if truncated:
+                        continue
+                    block = format_week_block(columns, monday, columns.rows_by_week()[monday])
+                    if emitted + len(block) > QUERY_MAX_OUTPUT_CHARS:
+                        # Send the rows that still fit, then only keep counting
+                        block = cut_week_block(block, QUERY_MAX_OUTPUT_CHARS - emitted)
+                        truncated = True
+                        if not block:
+                            continue
+                    emitted += len(block)
+                    line = json.dumps({
+                        "type": "week",
+                        "week_start": date.fromordinal(monday).isoformat(),
+                        "formatted_output": block,
+                        "entries": week.entries,
+                        "hours": round(week.hours, 2),
+                        "billable_hours": round(week.billable_hours, 2),
+                        "truncated": truncated,
+                        "running_totals": {
+                            "entries": total_entries,
+                            "hours": round(total_hours, 2),
+                            "billable_hours": round(total_billable_hours, 2),
+                        },
+                    }) + "\n"
+                    replay.append(line)
+                    yield line
+        except Exception as e:
+            logger.exception("Error in stream_time_entries")
+            detail = e.detail if isinstance(e, HTTPException) else f"Internal server error: {e}"
+            yield json.dumps({"type": "error", "detail": detail}) + "\n"
+            return
+
+        if aggregate is not None:
+            total_entries, total_hours, total_billable_hours = aggregate.totals()
+            summary, truncated = format_result(aggregate, payload, start_date, end_date)
+        elif total_entries:
+            summary = "\n".join(format_summary(total_entries, total_hours, total_billable_hours))
+            if truncated:
+                summary = f"{truncation_marker(QUERY_MAX_OUTPUT_CHARS)}\n\n{summary}"
+        else:
+            summary = f"No time entries found for {start_date} to {end_date}"
+        metrics.entries_returned.observe(total_entries, "/query_time_entries/stream")
+        line = json.dumps({
+            "type": "summary",
+            "formatted_output": summary,
+            "total_entries": total_entries,
+            "total_hours": round(total_hours, 2),
+            "billable_hours": round(total_billable_hours, 2),
+            "truncated": truncated,
+        }) + "\n"
+        replay.append(line)
+        # Only a complete stream is cached; hits replay its events verbatim
+        query_cache.set(cache_key, replay, generation=generation)
+        yield line
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -0,0 +1,146 @@
+"""Application-scoped pooled HTTP client for the Kantata API.
+
+A single ``httpx.AsyncClient`` is created in the FastAPI lifespan hook and
+shared by every helper and handler, so connections to api.mavenlink.com are
+kept alive and reused instead of paying a TCP+TLS handshake per call.
+"""
+import asyncio
+import logging
+import time
+
+import httpx
+
+from . import metrics
+from .config import (
+    BASE_URL, HEADERS, TOKEN,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY,
+    HTTP2, HTTP_WARMUP_CONNECTIONS, HTTP_TIMEOUTS, HTTP_DEFAULT_TIMEOUT,
+    RETRY_MAX_ATTEMPTS,
+)
+from .ratelimit import THROTTLE_STATUSES, backoff_delay, limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    http2 = HTTP2 and _http2_available()
+    if HTTP2 and not http2:
+        logger.warning("KANTATA_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        headers=HEADERS,
+        timeout=HTTP_DEFAULT_TIMEOUT,
+        limits=limits,
+        http2=http2,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside of the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+def timeout_for(path: str) -> float:
+    """Return the configured timeout for a Kantata API path."""
+    for prefix, timeout in HTTP_TIMEOUTS.items():
+        if path.startswith(prefix):
+            return timeout
+    return HTTP_DEFAULT_TIMEOUT
+
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def _send(method: str, path: str, path_label: str, **kwargs) -> httpx.Response:
+    await limiter.acquire()
+    metrics.upstream_in_flight.inc(path_label)
+    started = time.perf_counter()
+    status = "error"
+    retry_after = None
+    try:
+        response = await get_client().request(method, path, **kwargs)
+        status = response.status_code
+        if status in THROTTLE_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        return response
+    finally:
+        limiter.release(status if isinstance(status, int) else None, retry_after)
+        metrics.upstream_in_flight.dec(path_label)
+        metrics.upstream_latency.observe(time.perf_counter() - started, method, path_label, status)
+
+
+async def request(method: str, path: str, **kwargs) -> httpx.Response:
+    """Send a request through the shared client using the per-endpoint timeout.
+
+    Every call passes through the process-wide rate limiter. Idempotent
+    requests that are throttled (429/503) or fail at the transport level are
+    retried with backoff; the last response is returned either way so callers
+    still see a throttled status once retries run out.
+    """
+    kwargs.setdefault("timeout", timeout_for(path))
+    path_label = metrics.normalize_path(path)
+    attempts = RETRY_MAX_ATTEMPTS if method.upper() in IDEMPOTENT_METHODS else 1
+    for attempt in range(1, attempts + 1):
+        try:
+            response = await _send(method, path, path_label, **kwargs)
+        except httpx.TransportError as e:
+            if attempt == attempts:
+                raise
+            reason, retry_after = type(e).__name__, None
+        else:
+            if response.status_code not in THROTTLE_STATUSES or attempt == attempts:
+                return response
+            reason = str(response.status_code)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        delay = backoff_delay(attempt, retry_after)
+        metrics.upstream_retries.inc(path_label, reason)
+        logger.info(
+            "Retrying Kantata %s %s after %s", method, path_label, reason,
+            extra={"fields": {"attempt": attempt, "delay": round(delay, 3)}},
+        )
+        await asyncio.sleep(delay)
+
+
+async def warm_up() -> None:
+    """Open a few pooled connections ahead of the first real request."""
+    if not TOKEN or HTTP_WARMUP_CONNECTIONS <= 0:
+        return
+    client = get_client()
+    results = await asyncio.gather(
+        *(client.get("/users/me.json", timeout=HTTP_DEFAULT_TIMEOUT) for _ in range(HTTP_WARMUP_CONNECTIONS)),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Kantata connection warm-up failed: %s", result)
+            break
+
+
+async def startup() -> None:
+    get_client()
+    await warm_up()
+
+
+async def shutdown() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,60 @@
+"""Import-time breakdown for cold-start tuning.
+
+    python -m mcp_server.importtime [module ...] [--top N]
+
+Imports each target (default: the server app and the client tool registry)
+in a fresh interpreter under ``-X importtime`` and reports the total, the
+self time per top-level package and the slowest imports by cumulative time.
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_TARGETS = ("mcp_server.main", "tools")
+
+
+def measure(module: str) -> list[tuple[str, int, int]]:
+    """Return ``(name, self_us, cumulative_us)`` for every import made by ``import module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(module: str, top: int) -> str:
+    rows = measure(module)
+    total = sum(self_us for _, self_us, _ in rows)
+    by_package: dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    lines = [f"{module}: {total / 1000:.1f} ms across {len(rows)} imports", "  by package (self time):"]
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"    {package:<32} {self_us / 1000:8.1f} ms  {self_us / total:6.1%}")
+    lines.append("  slowest imports (cumulative):")
+    for name, _, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"    {name:<48} {cumulative_us / 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--top", type=int, default=12, help="rows per section")
+    args = parser.parse_args()
+    print("\n\n".join(report(module, args.top) for module in args.modules))
+
+
+if __name__ == "__main__":
+    main()
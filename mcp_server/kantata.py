@@ -1,174 +1,628 @@
 """Utility functions for interacting with the Kantata API."""
-import httpx
+import asyncio
+import logging
+import sys
+from collections import deque
+from datetime import date, timedelta
+
 from fastapi import HTTPException
-from .config import BASE_URL, HEADERS, TOKEN
+from .cache import MISSING, TTLCache
+from .config import (
+    TOKEN, LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TTL, LOOKUP_CACHE_NEGATIVE_TTL, PAGE_CONCURRENCY,
+    PAGE_READAHEAD, QUERY_CACHE_SIZE, QUERY_CACHE_TTL, RESOLVE_DEADLINE, SHARD_THRESHOLD_DAYS, SHARD_TARGET_ENTRIES, TIME_ENTRY_CONCURRENCY,
+)
+from . import metrics
+from .directory import AmbiguousName, directory
+from .http_client import request
+from .records import TimeEntryRecord
+from .replica import replica
+
+logger = logging.getLogger(__name__)
+
+# Resolved name lookups keyed by (kind, normalized search term[, workspace_id]).
+# 404s are cached as _NotFound markers with the shorter negative TTL.
+lookup_cache = TTLCache(LOOKUP_CACHE_SIZE, LOOKUP_CACHE_TTL, LOOKUP_CACHE_NEGATIVE_TTL)
+
+# Query results keyed by (start_date, end_date, user_id, workspace_id, story_id, view),
+# where view is the output mode/grouping requested
+query_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+
+def invalidate_time_entry_queries(
+    user_id: int, workspace_id: int, story_id: int | None, date_performed: str
+) -> int:
+    """Drop cached query results that a new entry with these attributes would change."""
+    def affected(key: tuple) -> bool:
+        start_date, end_date, query_user_id, query_workspace_id, query_story_id, _view = key
+        return (
+            start_date <= date_performed <= end_date
+            and query_user_id in (None, user_id)
+            and query_workspace_id in (None, workspace_id)
+            and query_story_id in (None, story_id)
+        )
+    return query_cache.invalidate(affected)
+
+class _NotFound:
+    __slots__ = ("detail",)
+
+    def __init__(self, detail: str):
+        self.detail = detail
+
+# Identical GETs currently in flight, keyed by (path, sorted params)
+_in_flight: dict[tuple, asyncio.Task] = {}
+
+async def _send_get(path: str, params: dict | None, slots: asyncio.Semaphore | None):
+    if slots is None:
+        return await request("GET", path, params=params)
+    async with slots:
+        return await request("GET", path, params=params)
+
+async def get_coalesced(path: str, params: dict | None = None, slots: asyncio.Semaphore | None = None):
+    """GET ``path`` once for every concurrent caller asking for the same path and params.
+
+    The first caller (the leader) starts the request as a task; callers that
+    arrive while it is in flight await the same response.  The task is
+    shielded so one caller cancelling does not fail the others.
+    """
+    key = (path, tuple(sorted((name, str(value)) for name, value in (params or {}).items())))
+    task = _in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_send_get(path, params, slots))
+        _in_flight[key] = task
+
+        def done(finished: asyncio.Task) -> None:
+            if _in_flight.get(key) is finished:
+                del _in_flight[key]
+            if not finished.cancelled():
+                finished.exception()  # mark retrieved even if every caller went away
+
+        task.add_done_callback(done)
+    else:
+        metrics.upstream_coalesced.inc(metrics.normalize_path(path))
+    return await asyncio.shield(task)
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+async def _cached_lookup(key: tuple, fetch) -> dict:
+    cached = lookup_cache.get(key)
+    if isinstance(cached, _NotFound):
+        raise HTTPException(404, cached.detail)
+    if cached is not MISSING:
+        return cached
+    try:
+        result = await fetch()
+    except HTTPException as e:
+        if e.status_code == 404:
+            lookup_cache.set(key, _NotFound(e.detail), ttl=lookup_cache.negative_ttl)
+        raise
+    lookup_cache.set(key, result)
+    return result
 
 async def search_workspaces(name: str) -> list:
-    async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=10) as client:
-        r = await client.get("/workspaces.json", params={"search": name})
-        if r.status_code == 200:
-            return r.json().get("workspaces", {})
-        return {}
+    r = await get_coalesced("/workspaces.json", {"search": name})
+    if r.status_code != 200:
+        raise HTTPException(502, f"Kantata returned {r.status_code} for /workspaces.json search")
+    return r.json().get("workspaces", {})
 
 async def search_stories(workspace_id: int, name: str | None = None) -> list:
-    async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=10) as client:
-        params = {"workspace_id": workspace_id}
-        if name:
-            params["search"] = name
-        r = await client.get("/stories.json", params=params)
-        if r.status_code == 200:
-            return r.json().get("stories", {})
-        return {}
+    params = {"workspace_id": workspace_id}
+    if name:
+        params["search"] = name
+    r = await get_coalesced("/stories.json", params)
+    if r.status_code != 200:
+        raise HTTPException(502, f"Kantata returned {r.status_code} for /stories.json search")
+    return r.json().get("stories", {})
 
 async def search_users(name: str) -> list:
-    async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=10) as client:
-        r = await client.get("/users.json", params={"search": name})
-        if r.status_code == 200:
-            return r.json().get("users", {})
-        return {}
+    r = await get_coalesced("/users.json", {"search": name})
+    if r.status_code != 200:
+        raise HTTPException(502, f"Kantata returned {r.status_code} for /users.json search")
+    return r.json().get("users", {})
+
+async def create_time_entry(time_entry: dict):
+    """POST a time entry to Kantata and invalidate anything it makes stale.
+
+    Returns the entry id reported by Kantata; raises HTTPException with the
+    upstream status and body on failure.
+    """
+    r = await request("POST", "/time_entries.json", json={"time_entry": time_entry}, timeout=10)
+    if r.status_code not in (200, 201):
+        raise HTTPException(r.status_code, r.text)
+    replica.note_write()
+    invalidate_time_entry_queries(
+        time_entry["user_id"], time_entry["workspace_id"], time_entry.get("story_id"), time_entry["date_performed"]
+    )
+    data = r.json()
+    return data.get("results", ["?"])[0]
+
+async def fetch_all(path: str, key: str, params: dict | None = None) -> dict:
+    """Fetch every record of a collection endpoint, following pagination."""
+    records: dict = {}
+    page = 1
+    per_page = 200
+    while True:
+        r = await get_coalesced(path, {**(params or {}), "per_page": per_page, "page": page})
+        if r.status_code != 200:
+            raise HTTPException(502, f"Kantata returned {r.status_code} for {path} page {page}")
+        page_records = r.json().get(key, {})
+        records.update(page_records)
+        if len(page_records) < per_page:
+            return records
+        page += 1
+
+def user_display_name(user_data: dict, default: str) -> str:
+    """Build a display name from whichever name fields Kantata returned."""
+    if user_data.get("first_name") and user_data.get("last_name"):
+        return f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip()
+    elif user_data.get("name"):
+        return user_data["name"]
+    elif user_data.get("full_name"):
+        return user_data["full_name"]
+    elif user_data.get("display_name"):
+        return user_data["display_name"]
+    return default
+
+TIME_ENTRIES_PER_PAGE = 200  # Increased from 100 to reduce number of pages
+
+# Shared by every /time_entries.json GET so sharded and concurrent queries
+# together never exceed TIME_ENTRY_CONCURRENCY in-flight requests.
+_time_entry_slots = asyncio.Semaphore(TIME_ENTRY_CONCURRENCY)
 
-async def fetch_time_entries(
+# Recent entries-per-day observed for each filter shape, used to size shards
+_entry_density: dict[tuple[bool, bool, bool], float] = {}
+
+def _time_entry_params(
+    start_date: str,
+    end_date: str,
+    user_id: int | None,
+    workspace_id: int | None,
+    story_id: int | None,
+    page: int,
+) -> dict:
+    params = {
+        "date_performed_between": f"{start_date}:{end_date}",
+        "per_page": TIME_ENTRIES_PER_PAGE,
+        "page": page,
+        "include": "user,workspace,story",  # Include related data to avoid extra API calls
+    }
+    if user_id:
+        params["with_user_ids"] = user_id
+    if workspace_id:
+        params["workspace_id"] = workspace_id
+    if story_id:
+        params["story_id"] = story_id
+    return params
+
+def _int_or_none(value) -> int | None:
+    return int(value) if value not in (None, "") else None
+
+def add_time_entry_records(raw_entries: dict, included_data: dict, entries: dict) -> None:
+    """Convert raw Kantata entries into TimeEntryRecords stored in ``entries`` by id.
+
+    Names come from ``included_data`` and are computed and interned once
+    per related record rather than once per entry.
+    """
+    names: dict[tuple[str, int], str | None] = {}
+
+    def name_of(kind: str, record_id: int | None) -> str | None:
+        if record_id is None:
+            return None
+        key = (kind, record_id)
+        if key not in names:
+            record = included_data.get(kind, {}).get(str(record_id))
+            if record is None:
+                name = None
+            elif kind == "users":
+                name = user_display_name(record, "Unknown User")
+            elif kind == "workspaces":
+                name = record.get("title", f"Workspace {record_id}")
+            else:
+                name = record.get("title", "")
+            names[key] = sys.intern(name) if name else name
+        return names[key]
+
+    for entry_id, raw in raw_entries.items():
+        user_id = _int_or_none(raw.get("user_id"))
+        workspace_id = _int_or_none(raw.get("workspace_id"))
+        story_id = _int_or_none(raw.get("story_id"))
+        entries[str(entry_id)] = TimeEntryRecord(
+            str(entry_id),
+            raw.get("date_performed") or "",
+            user_id,
+            workspace_id,
+            story_id,
+            raw.get("time_in_minutes") or 0,
+            bool(raw.get("billable", False)),
+            raw.get("notes") or "",
+            raw.get("updated_at"),
+            name_of("users", user_id),
+            name_of("workspaces", workspace_id),
+            name_of("stories", story_id),
+        )
+
+def _merge_time_entry_page(data: dict, entries: dict, included_data: dict) -> None:
+    # Collect included data from each page, then build records named from it
+    for key in ("users", "workspaces", "stories"):
+        if key in data:
+            included_data[key].update(data[key])
+    add_time_entry_records(data.get("time_entries", {}), included_data, entries)
+
+def _page_count(data: dict) -> int | None:
+    """Total number of pages reported by Kantata, if the response includes it."""
+    meta = data.get("meta") or {}
+    if meta.get("page_count") is not None:
+        return int(meta["page_count"])
+    count = meta.get("count", data.get("count"))
+    if count is None:
+        return None
+    return max(1, -(-int(count) // TIME_ENTRIES_PER_PAGE))
+
+async def _get_time_entry_page(params: dict):
+    return await get_coalesced("/time_entries.json", params, _time_entry_slots)
+
+def _check_time_entry_page(response, page: int) -> None:
+    if response.status_code != 200:
+        raise HTTPException(
+            502, f"Kantata returned {response.status_code} for time entries page {page}; results would be incomplete"
+        )
+
+def _has_next_page(response, data: dict) -> bool:
+    # Determine if there is another page.  The Kantata API includes a
+    # "next" link in the response headers when more results are
+    # available.  If the header is missing or the returned page has
+    # fewer results than requested, stop fetching.
+    link_header = response.headers.get("Link", "")
+    has_next = "rel=\"next\"" in link_header or data.get("next_page")
+    return bool(has_next) and len(data.get("time_entries", {})) >= TIME_ENTRIES_PER_PAGE
+
+def split_date_range(start_date: str, end_date: str, window: str) -> list[tuple[str, str]]:
+    """Split an inclusive ISO date range into Monday-aligned weeks or calendar months."""
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    windows = []
+    current = start
+    while current <= end:
+        if window == "week":
+            window_end = current + timedelta(days=6 - current.weekday())
+        else:
+            next_month = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            window_end = next_month - timedelta(days=1)
+        window_end = min(window_end, end)
+        windows.append((current.isoformat(), window_end.isoformat()))
+        current = window_end + timedelta(days=1)
+    return windows
+
+def _shard_window(density_key: tuple[bool, bool, bool]) -> str:
+    """Pick week-sized shards when earlier queries of this shape were dense."""
+    density = _entry_density.get(density_key)
+    if density is not None and density * 30 > SHARD_TARGET_ENTRIES:
+        return "week"
+    return "month"
+
+def _incremental_window(density_key: tuple[bool, bool, bool]) -> str:
+    """Pick week windows unless earlier queries of this shape fitted a month on one page.
+
+    A month that comes back in one page is complete as soon as a week
+    window would be, so splitting it would only cost upstream calls.
+    """
+    density = _entry_density.get(density_key)
+    if density is not None and density * 31 <= TIME_ENTRIES_PER_PAGE:
+        return "month"
+    return "week"
+
+def _record_density(density_key: tuple[bool, bool, bool], entry_count: int, days: int) -> None:
+    observed = entry_count / max(days, 1)
+    previous = _entry_density.get(density_key)
+    _entry_density[density_key] = observed if previous is None else 0.5 * previous + 0.5 * observed
+
+class _PageBudget:
+    """Read-ahead limit shared by the window producers of one iter_time_entry_pages call.
+
+    A page holds a slot from just before it is requested until the consumer
+    takes it, so at most ``limit`` pages are in flight or buffered across
+    all windows.  The window being consumed (the head) never waits for a
+    slot: the consumer is blocked on it, so it must always make progress,
+    and its own read-ahead is already bounded by PAGE_CONCURRENCY.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.outstanding = 0
+        self.head = 0
+        self._waiting: list[int] = []
+        self._changed = asyncio.Condition()
+
+    async def acquire(self, window: int) -> None:
+        # Free slots go to the earliest waiting window, so read-ahead
+        # follows date order instead of spreading over every window
+        async with self._changed:
+            self._waiting.append(window)
+            try:
+                await self._changed.wait_for(
+                    lambda: window <= self.head
+                    or (self.outstanding < self.limit and window == min(self._waiting))
+                )
+            finally:
+                self._waiting.remove(window)
+            self.outstanding += 1
+            self._changed.notify_all()
+
+    async def release(self) -> None:
+        async with self._changed:
+            self.outstanding -= 1
+            self._changed.notify_all()
+
+    async def advance(self) -> None:
+        async with self._changed:
+            self.head += 1
+            self._changed.notify_all()
+
+async def _iter_range_pages(
+    start_date: str,
+    end_date: str,
+    user_id: int | None,
+    workspace_id: int | None,
+    story_id: int | None,
+    reserve,
+):
+    """Yield the raw page dicts of one date range in page order.
+
+    Once page 1 reports the page count, up to PAGE_CONCURRENCY later pages
+    are fetched ahead of the consumer; otherwise pages are walked
+    sequentially.  ``reserve`` is awaited before every page request.
+    """
+    def params_for(page: int) -> dict:
+        return _time_entry_params(start_date, end_date, user_id, workspace_id, story_id, page)
+
+    await reserve()
+    r = await _get_time_entry_page(params_for(1))
+    _check_time_entry_page(r, 1)
+    data = r.json()
+    yield data
+
+    page_count = _page_count(data)
+    if page_count is None:
+        page = 1
+        while _has_next_page(r, data):
+            page += 1
+            await reserve()
+            r = await _get_time_entry_page(params_for(page))
+            _check_time_entry_page(r, page)
+            data = r.json()
+            yield data
+        return
+
+    async def fetch_page(page: int) -> dict:
+        page_response = await _get_time_entry_page(params_for(page))
+        _check_time_entry_page(page_response, page)
+        return page_response.json()
+
+    pending: deque[asyncio.Task] = deque()
+    next_page = 2
+    try:
+        while next_page <= page_count or pending:
+            while next_page <= page_count and len(pending) < PAGE_CONCURRENCY:
+                await reserve()
+                pending.append(asyncio.create_task(fetch_page(next_page)))
+                next_page += 1
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+# Marks the end of one window's pages in iter_time_entry_pages
+_END_OF_RANGE = object()
+
+async def _pump_range_pages(
+    queue: asyncio.Queue,
+    budget: _PageBudget,
+    window: int,
+    start_date: str,
+    end_date: str,
+    user_id: int | None,
+    workspace_id: int | None,
+    story_id: int | None,
+) -> None:
+    """Feed one window's pages into ``queue``, then _END_OF_RANGE (or the error that stopped it)."""
+    try:
+        async for data in _iter_range_pages(
+            start_date, end_date, user_id, workspace_id, story_id, lambda: budget.acquire(window)
+        ):
+            await queue.put(data)
+    except Exception as e:
+        await queue.put(e)
+        return
+    await queue.put(_END_OF_RANGE)
+
+async def iter_time_entry_pages(
+    start_date: str,
+    end_date: str,
+    user_id: int | None = None,
+    workspace_id: int | None = None,
+    story_id: int | None = None,
+):
+    """Yield ``(entries, included_data)`` page by page instead of accumulating them.
+
+    Each page's TimeEntryRecords are yielded once (entries already seen on
+    an earlier page are dropped) and can be released by the caller.  Ranges
+    longer than SHARD_THRESHOLD_DAYS are split into week or month windows
+    (sized from the entry density seen by earlier queries with the same
+    filters) that are fetched concurrently, bounded by the shared
+    /time_entries.json cap, and yielded in date order.  All windows share
+    one read-ahead budget of PAGE_READAHEAD pages (see _PageBudget), so
+    memory stays bounded however many windows the range is split into.
+    """
+    async for _, entries, included_data in iter_dated_time_entry_pages(
+        start_date, end_date, user_id, workspace_id, story_id
+    ):
+        yield entries, included_data
+
+async def iter_dated_time_entry_pages(
     start_date: str,
     end_date: str,
     user_id: int | None = None,
     workspace_id: int | None = None,
     story_id: int | None = None,
-) -> tuple[dict, dict]:
-    """Fetch all time entries from Kantata API handling pagination with included related data."""
+    incremental: bool = False,
+):
+    """iter_time_entry_pages, yielding ``(done_before, entries, included_data)``.
+
+    ``done_before`` is an ISO date (the start of the page's window): every
+    entry performed before it has already been yielded, so callers that
+    group by date, such as the week events of /query_time_entries/stream,
+    know which groups are complete.  ``done_before`` only moves once per
+    window, so ``incremental`` splits any range, however short, into
+    windows that let such callers finish a group per week (see
+    _incremental_window).
+    """
     if not TOKEN:
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
 
-    entries: dict = {}
-    included_data: dict = {"users": {}, "workspaces": {}, "stories": {}}
-    page = 1
-    per_page = 200  # Increased from 100 to reduce number of pages
-
-    async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=60) as client:  # Increased timeout to 60s
-        while True:
-            params = {
-                "date_performed_between": f"{start_date}:{end_date}",
-                "per_page": per_page,
-                "page": page,
-                "include": "user,workspace,story",  # Include related data to avoid extra API calls
-            }
-
-            if user_id:
-                params["with_user_ids"] = user_id
-            if workspace_id:
-                params["workspace_id"] = workspace_id
-            if story_id:
-                params["story_id"] = story_id
-
-            r = await client.get("/time_entries.json", params=params)
-            if r.status_code != 200:
-                break
+    days = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1
+    density_key = (user_id is not None, workspace_id is not None, story_id is not None)
+    if incremental:
+        windows = split_date_range(start_date, end_date, _incremental_window(density_key))
+    elif days > SHARD_THRESHOLD_DAYS:
+        windows = split_date_range(start_date, end_date, _shard_window(density_key))
+    else:
+        windows = [(start_date, end_date)]
 
-            data = r.json()
-            page_entries = data.get("time_entries", {})
-            entries.update(page_entries)
-            
-            # Collect included data from each page
-            if "users" in data:
-                included_data["users"].update(data["users"])
-            if "workspaces" in data:
-                included_data["workspaces"].update(data["workspaces"])
-            if "stories" in data:
-                included_data["stories"].update(data["stories"])
-
-            # Determine if there is another page.  The Kantata API includes a
-            # "next" link in the response headers when more results are
-            # available.  If the header is missing or the returned page has
-            # fewer results than requested, stop fetching.
-            link_header = r.headers.get("Link", "")
-            has_next = "rel=\"next\"" in link_header or data.get("next_page")
-
-            if not has_next or len(page_entries) < per_page:
-                break
+    budget = _PageBudget(PAGE_READAHEAD)
+    queues = [asyncio.Queue(maxsize=PAGE_CONCURRENCY) for _ in windows]
+    producers = [
+        asyncio.create_task(
+            _pump_range_pages(queue, budget, window, window_start, window_end, user_id, workspace_id, story_id)
+        )
+        for window, (queue, (window_start, window_end)) in enumerate(zip(queues, windows))
+    ]
+    seen: set[str] = set()
+    pages = 0
+    try:
+        for queue, (window_start, _) in zip(queues, windows):
+            while (data := await queue.get()) is not _END_OF_RANGE:
+                if isinstance(data, Exception):
+                    raise data
+                await budget.release()
+                pages += 1
+                raw_entries = {
+                    entry_id: raw for entry_id, raw in data.get("time_entries", {}).items() if entry_id not in seen
+                }
+                seen.update(raw_entries)
+                included_data = {key: data.get(key, {}) for key in ("users", "workspaces", "stories")}
+                entries: dict = {}
+                add_time_entry_records(raw_entries, included_data, entries)
+                # Keep only the records alive while the caller holds the page
+                del data, raw_entries
+                yield window_start, entries, included_data
+            await budget.advance()
+    finally:
+        for producer in producers:
+            producer.cancel()
+    _record_density(density_key, len(seen), days)
+    metrics.time_entry_pages.observe(pages)
 
-            page += 1
+async def fetch_updated_time_entries(updated_after: str) -> tuple[dict, dict]:
+    """Fetch every time entry created or changed since ``updated_after`` (ISO 8601)."""
+    if not TOKEN:
+        raise HTTPException(500, "KANTATA_API_TOKEN not set")
 
-    return entries, included_data
+    entries: dict = {}
+    included_data: dict = {"users": {}, "workspaces": {}, "stories": {}}
+    page = 1
+    while True:
+        r = await _get_time_entry_page({
+            "updated_after": updated_after,
+            "per_page": TIME_ENTRIES_PER_PAGE,
+            "page": page,
+            "include": "user,workspace,story",
+        })
+        if r.status_code != 200:
+            raise HTTPException(502, f"Kantata returned {r.status_code} for updated time entries page {page}")
+        data = r.json()
+        _merge_time_entry_page(data, entries, included_data)
+        if len(data.get("time_entries", {})) < TIME_ENTRIES_PER_PAGE:
+            return entries, included_data
+        page += 1
 
 async def get_user_name(user_id: int) -> str:
     """Get user name by ID."""
     try:
-        async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=30) as client:
-            r = await client.get(f"/users/{user_id}.json")
-            print(f"DEBUG: get_user_name({user_id}) status={r.status_code}")
-            print(f"DEBUG: get_user_name({user_id}) raw response: {r.text}")
-            if r.status_code == 200:
-                response_data = r.json()
-                # The API returns data under 'users' key, then under the user ID
-                users_data = response_data.get("users", {})
-                user_data = users_data.get(str(user_id), {})
-                print(f"DEBUG: get_user_name({user_id}) user_data={user_data}")
-                if not user_data:
-                    print(f"WARNING: get_user_name({user_id}) user_data is empty!")
-                if user_data.get("first_name") and user_data.get("last_name"):
-                    return f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip()
-                elif user_data.get("name"):
-                    return user_data["name"]
-                elif user_data.get("full_name"):
-                    return user_data["full_name"]
-                elif user_data.get("display_name"):
-                    return user_data["display_name"]
-            else:
-                print(f"DEBUG: get_user_name({user_id}) failed, response={r.text}")
-    except Exception as e:
-        print(f"ERROR: get_user_name({user_id}) exception: {e}")
+        r = await get_coalesced(f"/users/{user_id}.json")
+        logger.debug("get_user_name(%s) status=%s", user_id, r.status_code)
+        if r.status_code == 200:
+            response_data = r.json()
+            # The API returns data under 'users' key, then under the user ID
+            users_data = response_data.get("users", {})
+            user_data = users_data.get(str(user_id), {})
+            if not user_data:
+                logger.warning("get_user_name(%s) returned no user data", user_id)
+            return user_display_name(user_data, f"User {user_id}")
+        else:
+            logger.warning("get_user_name(%s) failed with status %s", user_id, r.status_code)
+    except Exception:
+        logger.exception("get_user_name(%s) raised", user_id)
     return f"User {user_id}"
 
 async def get_workspace_name(workspace_id: int) -> str:
     """Get workspace name by ID."""
     try:
-        async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=30) as client:
-            r = await client.get(f"/workspaces/{workspace_id}.json")
-            print(f"DEBUG: get_workspace_name({workspace_id}) status={r.status_code}")
-            print(f"DEBUG: get_workspace_name({workspace_id}) raw response: {r.text}")
-            if r.status_code == 200:
-                response_data = r.json()
-                # The API returns data under 'workspaces' key, then under the workspace ID
-                workspaces_data = response_data.get("workspaces", {})
-                workspace_data = workspaces_data.get(str(workspace_id), {})
-                print(f"DEBUG: get_workspace_name({workspace_id}) workspace_data={workspace_data}")
-                if not workspace_data:
-                    print(f"WARNING: get_workspace_name({workspace_id}) workspace_data is empty!")
-                return workspace_data.get("title", f"Workspace {workspace_id}")
-            else:
-                print(f"DEBUG: get_workspace_name({workspace_id}) failed, response={r.text}")
-    except Exception as e:
-        print(f"ERROR: get_workspace_name({workspace_id}) exception: {e}")
+        r = await get_coalesced(f"/workspaces/{workspace_id}.json")
+        logger.debug("get_workspace_name(%s) status=%s", workspace_id, r.status_code)
+        if r.status_code == 200:
+            response_data = r.json()
+            # The API returns data under 'workspaces' key, then under the workspace ID
+            workspaces_data = response_data.get("workspaces", {})
+            workspace_data = workspaces_data.get(str(workspace_id), {})
+            if not workspace_data:
+                logger.warning("get_workspace_name(%s) returned no workspace data", workspace_id)
+            return workspace_data.get("title", f"Workspace {workspace_id}")
+        else:
+            logger.warning("get_workspace_name(%s) failed with status %s", workspace_id, r.status_code)
+    except Exception:
+        logger.exception("get_workspace_name(%s) raised", workspace_id)
     return f"Workspace {workspace_id}"
 
 async def get_story_name(story_id: int) -> str:
     """Get story name by ID."""
     try:
-        async with httpx.AsyncClient(base_url=BASE_URL, headers=HEADERS, timeout=30) as client:
-            r = await client.get(f"/stories/{story_id}.json")
-            print(f"DEBUG: get_story_name({story_id}) status={r.status_code}")
-            print(f"DEBUG: get_story_name({story_id}) raw response: {r.text}")
-            if r.status_code == 200:
-                response_data = r.json()
-                # The API returns data under 'stories' key, then under the story ID
-                stories_data = response_data.get("stories", {})
-                story_data = stories_data.get(str(story_id), {})
-                print(f"DEBUG: get_story_name({story_id}) story_data={story_data}")
-                if not story_data:
-                    print(f"WARNING: get_story_name({story_id}) story_data is empty!")
-                return story_data.get("title", f"Story {story_id}")
-            else:
-                print(f"DEBUG: get_story_name({story_id}) failed, response={r.text}")
-    except Exception as e:
-        print(f"ERROR: get_story_name({story_id}) exception: {e}")
+        r = await get_coalesced(f"/stories/{story_id}.json")
+        logger.debug("get_story_name(%s) status=%s", story_id, r.status_code)
+        if r.status_code == 200:
+            response_data = r.json()
+            # The API returns data under 'stories' key, then under the story ID
+            stories_data = response_data.get("stories", {})
+            story_data = stories_data.get(str(story_id), {})
+            if not story_data:
+                logger.warning("get_story_name(%s) returned no story data", story_id)
+            return story_data.get("title", f"Story {story_id}")
+        else:
+            logger.warning("get_story_name(%s) failed with status %s", story_id, r.status_code)
+    except Exception:
+        logger.exception("get_story_name(%s) raised", story_id)
     return f"Story {story_id}"
 
+def _directory_match(index, name: str, kind: str) -> tuple[str, dict] | None:
+    """The directory's unambiguous match for ``name``; several close matches are a 409."""
+    try:
+        return index.best(name)
+    except AmbiguousName as e:
+        raise HTTPException(
+            409, f"'{name}' matches several {kind}: {', '.join(e.candidates)}. Use a more specific name"
+        )
+
 async def lookup_workspace(name: str) -> dict:
     if not TOKEN:
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
-    workspaces = await search_workspaces(name)
-    if workspaces:
-        workspace_id = list(workspaces.keys())[0]
-        workspace_data = workspaces[workspace_id]
+    return await _cached_lookup(("workspace", normalize_name(name)), lambda: _lookup_workspace(name))
+
+async def _lookup_workspace(name: str) -> dict:
+    match = _directory_match(directory.workspaces, name, "workspaces") if directory.ready else None
+    if match is None:
+        workspaces = await search_workspaces(name)
+        if workspaces:
+            match = next(iter(workspaces.items()))
+    if match:
+        workspace_id, workspace_data = match
         return {
             "workspace_id": int(workspace_id),
             "name": workspace_data.get("title", name),
@@ -179,10 +633,20 @@ async def lookup_workspace(name: str) -> dict:
 async def lookup_story(workspace_id: int, name: str) -> dict:
     if not TOKEN:
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
-    stories = await search_stories(workspace_id, name)
-    if stories:
-        story_id = list(stories.keys())[0]
-        story_data = stories[story_id]
+    return await _cached_lookup(
+        ("story", int(workspace_id), normalize_name(name)), lambda: _lookup_story(workspace_id, name)
+    )
+
+async def _lookup_story(workspace_id: int, name: str) -> dict:
+    match = None
+    if directory.ready:
+        match = _directory_match(await directory.story_index(workspace_id), name, "tasks")
+    if match is None:
+        stories = await search_stories(workspace_id, name)
+        if stories:
+            match = next(iter(stories.items()))
+    if match:
+        story_id, story_data = match
         return {
             "story_id": int(story_id),
             "name": story_data.get("title", name),
@@ -193,24 +657,64 @@ async def lookup_story(workspace_id: int, name: str) -> dict:
 async def lookup_user(name: str) -> dict:
     if not TOKEN:
         raise HTTPException(500, "KANTATA_API_TOKEN not set")
-    users = await search_users(name)
-    if users:
-        user_id = list(users.keys())[0]
-        user_data = users[user_id]
-        user_name = ""
-        if user_data.get("first_name") and user_data.get("last_name"):
-            user_name = f"{user_data.get('first_name', '')} {user_data.get('last_name', '')}".strip()
-        elif user_data.get("name"):
-            user_name = user_data["name"]
-        elif user_data.get("full_name"):
-            user_name = user_data["full_name"]
-        elif user_data.get("display_name"):
-            user_name = user_data["display_name"]
-        else:
-            user_name = name
+    return await _cached_lookup(("user", normalize_name(name)), lambda: _lookup_user(name))
+
+async def _lookup_user(name: str) -> dict:
+    match = _directory_match(directory.users, name, "users") if directory.ready else None
+    if match is None:
+        users = await search_users(name)
+        if users:
+            match = next(iter(users.items()))
+    if match:
+        user_id, user_data = match
         return {
             "user_id": int(user_id),
-            "name": user_name,
+            "name": user_display_name(user_data, name),
             "email": user_data.get("email", ""),
         }
     raise HTTPException(404, f"No user found with name containing '{name}'")
+
+async def resolve_names(
+    user_name: str | None,
+    project_name: str | None,
+    task_name: str | None = None,
+    *,
+    strict: bool = True,
+    deadline: float = RESOLVE_DEADLINE,
+) -> tuple[dict | None, dict | None, dict | None]:
+    """Resolve user, workspace and story names to ``(user, workspace, story)``.
+
+    The user and workspace lookups run concurrently; the story lookup runs
+    once its workspace is known.  With ``strict=False`` a name that is not
+    found yields None instead of raising.  Exceeding ``deadline`` raises a 504.
+    """
+    async def guarded(lookup):
+        if strict:
+            return await lookup
+        try:
+            return await lookup
+        except HTTPException as e:
+            # Only "not found" drops a filter; an upstream failure must not
+            # silently widen the query to everyone
+            if e.status_code != 404:
+                raise
+            logger.debug("Lookup failed: %s", e.detail)
+            return None
+
+    async def resolve_user():
+        return await guarded(lookup_user(user_name)) if user_name else None
+
+    async def resolve_workspace_and_story():
+        workspace = await guarded(lookup_workspace(project_name)) if project_name else None
+        story = None
+        if task_name and workspace:
+            story = await guarded(lookup_story(workspace["workspace_id"], task_name))
+        return workspace, story
+
+    try:
+        user, (workspace, story) = await asyncio.wait_for(
+            asyncio.gather(resolve_user(), resolve_workspace_and_story()), deadline
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(504, f"Name resolution did not finish within {deadline:g}s")
+    return user, workspace, story
@@ -0,0 +1,100 @@
+"""Level-gated structured logging with a per-request correlation ID.
+
+Use ``logger.debug("... %s", value, extra={"fields": {...}})``: message
+arguments are only formatted once a record passes the level check, so
+debug calls cost a single ``isEnabledFor`` test in production.  Guard any
+expensive argument construction with ``logger.isEnabledFor(logging.DEBUG)``.
+"""
+import json
+import logging
+import uuid
+from contextvars import ContextVar
+
+from .config import LOG_LEVEL, LOG_FORMAT
+
+request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class KeyValueFormatter(logging.Formatter):
+    """``time level logger request_id=... message key=value ...``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        line = (
+            f"{self.formatTime(record)} {record.levelname} {record.name} "
+            f"request_id={record.request_id} {record.getMessage()}"
+        )
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": record.request_id,
+            "message": record.getMessage(),
+            **(getattr(record, "fields", None) or {}),
+        }
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def setup_logging() -> None:
+    """Install the formatter on the ``mcp_server`` logger hierarchy."""
+    logger = logging.getLogger("mcp_server")
+    if any(isinstance(f, RequestIdFilter) for h in logger.handlers for f in h.filters):
+        return
+    handler = logging.StreamHandler()
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else KeyValueFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+class RequestIdMiddleware:
+    """ASGI middleware binding X-Request-ID (or a fresh ID) for the whole request.
+
+    Implemented at the ASGI level so the ID stays bound while streaming
+    response bodies are produced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        rid = incoming.decode("latin-1") if incoming else new_request_id()
+        token = request_id.set(rid)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", rid.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
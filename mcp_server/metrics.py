@@ -0,0 +1,180 @@
+"""Minimal Prometheus-style metrics with text exposition at ``/metrics``.
+
+Metrics are plain dicts keyed by label-value tuples; recording a sample is
+a dict lookup plus a bisect, so instrumentation stays off the profile.
+"""
+import re
+import time
+from bisect import bisect_left
+
+_registry: list = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000, 50000, 100000)
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        _registry.append(self)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+    render = Counter.render
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are computed at scrape time by ``callback() -> {labels: value}``."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple, callback):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self.callback().items()
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._values.get(labels)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, series in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Application metrics ---
+
+handler_latency = Histogram(
+    "kantata_mcp_handler_latency_seconds", "Handler latency by route", ("method", "route", "status")
+)
+handler_in_flight = Gauge("kantata_mcp_handler_in_flight", "Requests currently being handled")
+upstream_latency = Histogram(
+    "kantata_upstream_latency_seconds", "Kantata API latency by path", ("method", "path", "status")
+)
+upstream_in_flight = Gauge("kantata_upstream_in_flight", "Kantata API requests in flight", ("path",))
+upstream_coalesced = Counter(
+    "kantata_upstream_coalesced_total", "Kantata GETs served by joining an identical in-flight request", ("path",)
+)
+upstream_retries = Counter(
+    "kantata_upstream_retries_total", "Kantata API requests retried after throttling or transport errors",
+    ("path", "reason"),
+)
+time_entry_pages = Histogram(
+    "kantata_time_entry_pages_per_query", "Kantata pages fetched per time entry fetch", buckets=COUNT_BUCKETS
+)
+entries_returned = Histogram(
+    "kantata_query_entries_returned", "Time entries returned per query", ("route",), buckets=COUNT_BUCKETS
+)
+
+_ID_SEGMENT = re.compile(r"/\d+(?=\.json|/|$)")
+
+
+def normalize_path(path: str) -> str:
+    """Collapse numeric IDs so ``/users/123.json`` is reported as ``/users/{id}.json``."""
+    return _ID_SEGMENT.sub("/{id}", path)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        handler_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            handler_in_flight.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            handler_latency.observe(time.perf_counter() - started, scope["method"], route_path, status["code"])
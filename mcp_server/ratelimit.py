@@ -0,0 +1,109 @@
+"""Process-wide limiter for Kantata API calls.
+
+Combines a token bucket (steady request rate with bursts) with an AIMD
+concurrency window: each successful response widens the window by
+roughly one request per round trip, each 429/503 halves it, and a
+``Retry-After`` header pauses every caller until the given time.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from .config import (
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, ADAPTIVE_MIN_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY,
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+)
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Delay before retry ``attempt`` (1-based): Retry-After if given, else full-jitter exponential."""
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+class AdaptiveLimiter:
+    def __init__(self, rate: float, burst: int, min_concurrency: int, max_concurrency: int):
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(max(self.min_concurrency, self.max_concurrency // 2))
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: deque = deque()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            timeout = None
+            if now < self._paused_until:
+                timeout = self._paused_until - now
+            elif self.in_flight < int(self.limit):
+                if self.rate <= 0:
+                    break
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    break
+                timeout = (1 - self._tokens) / self.rate
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await asyncio.wait({waiter}, timeout=timeout)
+        self.in_flight += 1
+
+    def release(self, status: int | None, retry_after: float | None = None) -> None:
+        """Return a slot and adapt the window to the upstream response."""
+        self.in_flight -= 1
+        if status in THROTTLE_STATUSES:
+            self.throttled += 1
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        elif status is not None and status < 500:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "throttled": self.throttled,
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 2)),
+        }
+
+
+limiter = AdaptiveLimiter(
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, ADAPTIVE_MIN_CONCURRENCY, ADAPTIVE_MAX_CONCURRENCY
+)
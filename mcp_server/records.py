@@ -0,0 +1,40 @@
+"""Compact record type for Kantata time entries."""
+from typing import NamedTuple
+
+
+class TimeEntryRecord(NamedTuple):
+    """The fields of a time entry that the handlers and replica use.
+
+    Built once per entry while a page is parsed (see
+    ``kantata.add_time_entry_records``) instead of keeping Kantata's full
+    JSON dict.  Names are interned, so every entry for the same user,
+    project or task shares one string; they are None when the related
+    record was not included in the response.
+    """
+
+    id: str
+    date_performed: str
+    user_id: int | None
+    workspace_id: int | None
+    story_id: int | None
+    time_in_minutes: float
+    billable: bool
+    notes: str
+    updated_at: str | None
+    user_name: str | None
+    project_name: str | None
+    task_name: str | None
+
+    def to_kantata(self) -> dict:
+        """The entry's own fields in Kantata's shape, as mirrored by the replica."""
+        return {
+            "id": self.id,
+            "date_performed": self.date_performed,
+            "user_id": self.user_id,
+            "workspace_id": self.workspace_id,
+            "story_id": self.story_id,
+            "time_in_minutes": self.time_in_minutes,
+            "billable": self.billable,
+            "notes": self.notes,
+            "updated_at": self.updated_at,
+        }
@@ -0,0 +1,320 @@
+"""Local SQLite replica of Kantata time entries with incremental delta sync.
+
+A full sync mirrors every entry performed since REPLICA_SINCE; afterwards a
+background task pulls only entries updated since the last watermark.
+Kantata does not report deletions through ``updated_after``, so a periodic
+full sync (REPLICA_FULL_SYNC_INTERVAL) replaces the mirrored range.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from .config import (
+    REPLICA_PATH, REPLICA_SINCE, REPLICA_SYNC_INTERVAL, REPLICA_FULL_SYNC_INTERVAL, REPLICA_MAX_AGE,
+    REPLICA_WRITE_SYNC_DELAY, REPLICA_PAGE_SIZE,
+)
+from .spool import TimeEntrySpool
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS time_entries (
+    id INTEGER PRIMARY KEY,
+    date_performed TEXT NOT NULL,
+    user_id INTEGER,
+    workspace_id INTEGER,
+    story_id INTEGER,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_time_entries_date ON time_entries (date_performed);
+CREATE INDEX IF NOT EXISTS idx_time_entries_user ON time_entries (user_id, date_performed);
+CREATE INDEX IF NOT EXISTS idx_time_entries_workspace ON time_entries (workspace_id, date_performed);
+CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS workspaces (id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS stories (id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_RELATED_TABLES = {"users": "user_id", "workspaces": "workspace_id", "stories": "story_id"}
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class Replica:
+    """SQLite mirror of time entries plus the users/workspaces/stories they reference."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._sync_lock = asyncio.Lock()
+        self._writes_pending = 0
+        self._write_sync: asyncio.Task | None = None
+        self.synced_at: float | None = None
+        self.full_synced_at: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = 'full_synced_at'").fetchone()
+            if row:
+                self.full_synced_at = float(row[0])
+        return self._conn
+
+    # --- Storage (run in a worker thread) ---
+
+    def _write(self, records, included_data: dict, replace_range: tuple[str, str] | None,
+               watermark: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                if replace_range is not None:
+                    conn.execute(
+                        "DELETE FROM time_entries WHERE date_performed BETWEEN ? AND ?", replace_range
+                    )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO time_entries "
+                    "(id, date_performed, user_id, workspace_id, story_id, updated_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (
+                            int(record.id),
+                            record.date_performed,
+                            record.user_id,
+                            record.workspace_id,
+                            record.story_id,
+                            record.updated_at,
+                            json.dumps(record.to_kantata()),
+                        )
+                        for record in records
+                    ),
+                )
+                for table in _RELATED_TABLES:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)",
+                        ((int(record_id), json.dumps(record)) for record_id, record in included_data[table].items()),
+                    )
+                state = {"watermark": watermark}
+                if replace_range is not None:
+                    state["full_synced_at"] = str(time.time())
+                conn.executemany(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", state.items()
+                )
+
+    def _watermark(self) -> str | None:
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM sync_state WHERE key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def _query(self, start_date: str, end_date: str, user_id: int | None, workspace_id: int | None,
+               story_id: int | None, after: tuple[str, int] | None,
+               limit: int) -> tuple[dict, dict, tuple[str, int] | None]:
+        """One page of matching entries in (date_performed, id) order.
+
+        ``after`` is the key of the last row of the previous page (keyset
+        pagination).  Returns ``(entries, included_data, last_key)``;
+        ``last_key`` is None once the range is exhausted.
+        """
+        sql = "SELECT id, date_performed, data FROM time_entries WHERE date_performed BETWEEN ? AND ?"
+        params: list = [start_date, end_date]
+        for column, value in (("user_id", user_id), ("workspace_id", workspace_id), ("story_id", story_id)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(int(value))
+        if after is not None:
+            sql += " AND (date_performed > ? OR (date_performed = ? AND id > ?))"
+            params.extend((after[0], after[0], after[1]))
+        sql += " ORDER BY date_performed, id LIMIT ?"
+        params.append(limit)
+
+        from .kantata import add_time_entry_records
+
+        with self._lock:
+            conn = self._connect()
+            raw_entries: dict = {}
+            last_key = None
+            for entry_id, date_performed, data in conn.execute(sql, params):
+                raw_entries[str(entry_id)] = json.loads(data)
+                last_key = (date_performed, entry_id)
+            included_data: dict = {}
+            for table, column in _RELATED_TABLES.items():
+                ids = {entry.get(column) for entry in raw_entries.values() if entry.get(column)}
+                included_data[table] = {}
+                id_list = [int(i) for i in ids]
+                # Stay under SQLite's bound-parameter limit
+                for offset in range(0, len(id_list), 500):
+                    chunk = id_list[offset:offset + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for record_id, data in conn.execute(
+                        f"SELECT id, data FROM {table} WHERE id IN ({placeholders})", chunk
+                    ):
+                        included_data[table][str(record_id)] = json.loads(data)
+        entries: dict = {}
+        add_time_entry_records(raw_entries, included_data, entries)
+        if len(raw_entries) < limit:
+            last_key = None
+        return entries, included_data, last_key
+
+    # --- Sync ---
+
+    async def sync(self, full: bool = False) -> None:
+        """Pull changes from Kantata; a full sync re-mirrors the whole range."""
+        from .kantata import fetch_updated_time_entries, iter_time_entry_pages
+
+        async with self._sync_lock:
+            writes_seen = self._writes_pending
+            # Overlap the watermark slightly so entries updated mid-sync are not missed
+            started = (_utc_now() - timedelta(minutes=1)).isoformat()
+            watermark = await asyncio.to_thread(self._watermark)
+            if full or watermark is None:
+                end_date = (date.today() + timedelta(days=366)).isoformat()
+                # Stream pages into a spool so a full mirror stays within ENTRY_MEMORY_BUDGET
+                included_data: dict = {table: {} for table in _RELATED_TABLES}
+                with TimeEntrySpool() as spool:
+                    async for entries, page_included in iter_time_entry_pages(REPLICA_SINCE, end_date):
+                        spool.extend(entries.values())
+                        for table in _RELATED_TABLES:
+                            included_data[table].update(page_included[table])
+                    await asyncio.to_thread(self._write, spool, included_data, (REPLICA_SINCE, end_date), started)
+                self.full_synced_at = time.time()
+            else:
+                entries, included_data = await fetch_updated_time_entries(watermark)
+                await asyncio.to_thread(self._write, entries.values(), included_data, None, started)
+            self.synced_at = time.time()
+            self._writes_pending -= writes_seen
+
+    def note_write(self) -> None:
+        """Record a successful upstream write; queries bypass the replica until it syncs.
+
+        Writes share one follow-up sync task, so a burst of writes (e.g. a
+        batch) triggers one delta sync rather than one per entry.
+        """
+        if not self.enabled:
+            return
+        self._writes_pending += 1
+        if self._write_sync is None:
+            self._write_sync = asyncio.create_task(self._sync_after_writes())
+
+    async def _sync_after_writes(self) -> None:
+        try:
+            # Writes noted while a sync runs are left pending by it, so loop
+            # until every write has been pulled back in
+            while self._writes_pending:
+                await asyncio.sleep(REPLICA_WRITE_SYNC_DELAY)
+                await self.sync()
+        except Exception as e:
+            logger.warning("Replica sync failed: %s", e)
+        finally:
+            self._write_sync = None
+
+    def serves(self, start_date: str) -> bool:
+        """Whether a query starting on ``start_date`` can be answered locally."""
+        return (
+            self.enabled
+            and self.synced_at is not None
+            and time.time() - self.synced_at <= REPLICA_MAX_AGE
+            and self._writes_pending == 0
+            and start_date >= REPLICA_SINCE
+        )
+
+    async def iter_time_entry_pages(
+        self,
+        start_date: str,
+        end_date: str,
+        user_id: int | None = None,
+        workspace_id: int | None = None,
+        story_id: int | None = None,
+    ):
+        """Yield ``(entries, included_data)`` pages of REPLICA_PAGE_SIZE entries in date order.
+
+        The local counterpart of kantata.iter_time_entry_pages: each page is
+        read with its own keyset query, so only one page is held at a time.
+        """
+        async for _, entries, included_data in self.iter_dated_time_entry_pages(
+            start_date, end_date, user_id, workspace_id, story_id
+        ):
+            yield entries, included_data
+
+    async def iter_dated_time_entry_pages(
+        self,
+        start_date: str,
+        end_date: str,
+        user_id: int | None = None,
+        workspace_id: int | None = None,
+        story_id: int | None = None,
+    ):
+        """iter_time_entry_pages, yielding ``(done_before, entries, included_data)``.
+
+        As in kantata.iter_dated_time_entry_pages.  Pages are in date order,
+        so ``done_before`` is the date of the last entry on the page.
+        """
+        after = None
+        while True:
+            entries, included_data, after = await asyncio.to_thread(
+                self._query, start_date, end_date, user_id, workspace_id, story_id, after, REPLICA_PAGE_SIZE
+            )
+            if entries:
+                yield next(reversed(entries.values())).date_performed, entries, included_data
+            if after is None:
+                return
+
+    async def _run(self) -> None:
+        # Load the persisted full-sync time before deciding the first sync,
+        # or every restart would re-mirror everything since REPLICA_SINCE
+        try:
+            await asyncio.to_thread(self._connect)
+        except sqlite3.Error as e:
+            logger.warning("Replica state could not be loaded: %s", e)
+        while True:
+            full = self.full_synced_at is None or time.time() - self.full_synced_at >= REPLICA_FULL_SYNC_INTERVAL
+            try:
+                await self.sync(full=full)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Replica sync failed: %s", e)
+            await asyncio.sleep(REPLICA_SYNC_INTERVAL)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        for task in (self._task, self._write_sync):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "since": REPLICA_SINCE,
+            "synced_at": self.synced_at,
+            "full_synced_at": self.full_synced_at,
+            "writes_pending": self._writes_pending,
+        }
+
+
+replica = Replica(REPLICA_PATH)
@@ -0,0 +1,66 @@
+"""Disk-backed spool for large time entry result sets."""
+import pickle
+import tempfile
+
+from .config import ENTRY_MEMORY_BUDGET
+from .records import TimeEntryRecord
+
+
+class TimeEntrySpool:
+    """Append-only sequence of TimeEntryRecords that spills to a temp file.
+
+    Up to ``budget`` records are kept in memory; each time the buffer fills
+    it is pickled as one batch to an anonymous temporary file, and
+    iteration reads the batches back in order before the buffer.
+    """
+
+    def __init__(self, budget: int = ENTRY_MEMORY_BUDGET):
+        self.budget = budget
+        self._buffer: list = []
+        self._file = None
+        self._spilled = 0
+
+    def extend(self, records) -> None:
+        self._buffer.extend(records)
+        if self.budget > 0 and len(self._buffer) >= self.budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._file is None:
+            self._file = tempfile.TemporaryFile()
+        self._file.seek(0, 2)
+        pickle.dump([tuple(record) for record in self._buffer], self._file, pickle.HIGHEST_PROTOCOL)
+        self._spilled += len(self._buffer)
+        self._buffer = []
+
+    @property
+    def spilled(self) -> int:
+        """Number of records currently held on disk."""
+        return self._spilled
+
+    def __len__(self) -> int:
+        return self._spilled + len(self._buffer)
+
+    def __iter__(self):
+        if self._file is not None:
+            self._file.seek(0)
+            remaining = self._spilled
+            while remaining:
+                batch = pickle.load(self._file)
+                remaining -= len(batch)
+                for fields in batch:
+                    yield TimeEntryRecord(*fields)
+        yield from self._buffer
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = []
+        self._spilled = 0
+
+    def __enter__(self) -> "TimeEntrySpool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
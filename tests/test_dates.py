@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from mcp_server.dates import DateParseError, resolve_date, resolve_period
+
+TODAY = date(2025, 6, 4)
+
+
+@pytest.mark.parametrize("text", [
+    "0000",
+    "q1 0000",
+    "jan 0000",
+    "0000-01",
+    "99999 years ago",
+    "last 9999 years",
+    "1000000 days ago",
+    "99999999999 days ago",
+    "week of 9999-12-31",
+    "since 0000",
+    "0000 to 2025",
+])
+def test_out_of_range_period_is_a_parse_error(text):
+    with pytest.raises(DateParseError):
+        resolve_period(text, today=TODAY)
+    # The memoized path must not leak ValueError/OverflowError either
+    with pytest.raises(DateParseError):
+        resolve_period(text)
+
+
+@pytest.mark.parametrize("text", ["99999 years ago", "1000000 days ago", "99999999999 weeks ago"])
+def test_out_of_range_date_is_a_parse_error(text):
+    with pytest.raises(DateParseError):
+        resolve_date(text, today=TODAY)
+
+
+@pytest.mark.parametrize("text, today", [
+    ("next year", date(9999, 6, 1)),
+    ("this week", date(9999, 12, 31)),
+    ("tomorrow", date(9999, 12, 31)),
+    ("next friday", date(9999, 12, 31)),
+    ("yesterday", date(1, 1, 1)),
+])
+def test_arithmetic_past_the_calendar_is_a_parse_error(text, today):
+    with pytest.raises(DateParseError):
+        resolve_period(text, today=today)
+
+
+def test_invalid_date_reports_why():
+    with pytest.raises(DateParseError, match="out of range"):
+        resolve_period("0000", today=TODAY)
+
+
+def test_valid_periods_still_resolve():
+    assert resolve_period("2025", today=TODAY) == (date(2025, 1, 1), date(2025, 12, 31))
+    assert resolve_period("q2 2025", today=TODAY) == (date(2025, 4, 1), date(2025, 6, 30))
+    assert resolve_period("last 3 weeks", today=TODAY) == (date(2025, 5, 15), TODAY)
+    assert resolve_period("week of 0001-01-01", today=TODAY) == (date(1, 1, 1), date(1, 1, 7))
@@ -7,14 +7,17 @@ schema = {
             "Query time entries from Kantata for a given time period. Accepts natural language "
             "time periods like 'this week', 'this month', 'last week', 'yesterday', etc. "
             "Can filter by user name, project name, and task name. Returns formatted results "
-            "grouped by week with user names, project names, and task names (not IDs)."
+            "grouped by week with user names, project names, and task names (not IDs). "
+            "For broad questions (whole team, long periods, 'who logged the most') use mode "
+            "'summary' or 'top' with group_by, which return only per-group totals. Long results "
+            "are cut off and marked truncated."
         ),
         "parameters": {
             "type": "object",
             "properties": {
                 "time_period": {
                     "type": "string", 
-                    "description": "Time period to query. Examples: 'this week', 'this month', 'last week', 'yesterday', 'last month', 'this year', or specific date range like '2024-01-01 to 2024-01-31'"
+                    "description": "Time period to query. Examples: 'this week', 'this month', 'last week', 'yesterday', 'last month', 'this year', 'last 3 weeks', 'Q2 2025', 'june 2025', 'since monday', or specific date range like '2024-01-01 to 2024-01-31'"
                 },
                 "user_name": {
                     "type": "string", 
@@ -27,6 +30,22 @@ schema = {
                 "task_name": {
                     "type": "string", 
                     "description": "Optional: Filter by task/story name"
+                },
+                "mode": {
+                    "type": "string",
+                    "enum": ["rows", "summary", "top"],
+                    "description": "Optional: 'rows' (default) lists every entry by week; 'summary' returns totals per group; 'top' returns the largest groups by hours"
+                },
+                "group_by": {
+                    "type": "string",
+                    "enum": ["week", "user", "project", "task", "billable"],
+                    "description": "Optional: Grouping for 'summary' and 'top' modes (default 'week')"
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 100,
+                    "description": "Optional: Number of groups returned in 'top' mode (default 10)"
                 }
             },
             "required": ["time_period"]